@@ -0,0 +1,202 @@
+"""Headless benchmarks for pygame-widget-kit.
+
+Builds synthetic component trees out of the built-in widgets and measures
+construction time, draw throughput and UIManager event throughput (per event
+and batched through process_events) with the SDL dummy video driver. Results
+are written as JSON so runs can be compared between releases:
+
+    python benchmarks/bench_widgets.py --sizes 100 1000 10000 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pygame
+from pygame_widget_kit import (
+    Button, Radio, Select, Slider, TextArea, TextInput, UIManager, Widget,
+)
+
+
+SCREEN_SIZE = (1280, 720)
+CELL_SIZE = (160, 90)
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+
+
+def count_nodes(component):
+    return 1 + sum(count_nodes(child) for child in component.children)
+
+
+def make_cell(index, x, y):
+    # one widget per cell, cycling through the built-in widget types
+    kind = index % 6
+    if kind == 0:
+        return Button(f"Button {index}", pos=(x, y), size=(140, 32))
+    if kind == 1:
+        return Select((x, y, 140, 28), options=["Easy", "Hard", "Expert"])
+    if kind == 2:
+        return Radio((x, y, 140, 22), options=["A", "B", "C"], item_height=20, spacing=2)
+    if kind == 3:
+        return Slider((x, y), size=(140, 16), min_value=0, max_value=100)
+    if kind == 4:
+        return TextInput(rect=(x, y, 140, 32), initial_text=f"input {index}")
+    return TextArea((x, y, 140, 80), text_str=f"text area {index}\nsecond line", max_chars_per_line=16)
+
+
+def build_tree(node_target):
+    # cells are tiled over the screen; pages of cells stack on top of each
+    # other so hit testing sees a realistic amount of overlap
+    root = Widget((0, 0) + SCREEN_SIZE, color=(250, 250, 250))
+    columns = SCREEN_SIZE[0] // CELL_SIZE[0]
+    rows = SCREEN_SIZE[1] // CELL_SIZE[1]
+    per_page = columns * rows
+
+    nodes = 1
+    index = 0
+    page = None
+    while nodes < node_target:
+        if index % per_page == 0:
+            page = Widget((0, 0) + SCREEN_SIZE)
+            root.add_child(page)
+            nodes += 1
+        slot = index % per_page
+        x = (slot % columns) * CELL_SIZE[0] + 8
+        y = (slot // columns) * CELL_SIZE[1] + 8
+        cell = make_cell(index, x, y)
+        page.add_child(cell)
+        nodes += count_nodes(cell)
+        index += 1
+    return root
+
+
+def mouse_script(count, rng):
+    events = []
+    x, y = SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2
+    for i in range(count):
+        x = max(0, min(SCREEN_SIZE[0] - 1, x + rng.randint(-25, 25)))
+        y = max(0, min(SCREEN_SIZE[1] - 1, y + rng.randint(-25, 25)))
+        events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(0, 0), buttons=(0, 0, 0)))
+        if i % 50 == 49:
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x, y), button=1))
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(x, y), button=1))
+    return events
+
+
+def keyboard_script(count, rng):
+    events = []
+    for i in range(count):
+        if i % 20 == 19:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_BACKSPACE, unicode="", mod=0))
+        else:
+            char = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a, unicode=char, mod=0))
+    return events
+
+
+def close_modal(ui):
+    if ui.modal is not None:
+        ui.modal.close()
+
+
+def rate(count, seconds):
+    return count / seconds if seconds > 0 else float("inf")
+
+
+def bench_size(screen, node_target, frames, event_count, seed):
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    root = build_tree(node_target)
+    ui = UIManager(root, background_color=(250, 250, 250))
+    construction = time.perf_counter() - start
+
+    # full redraw of the whole tree
+    start = time.perf_counter()
+    for _ in range(frames):
+        root.draw(screen)
+    draw_time = time.perf_counter() - start
+
+    # dirty-rect render of an idle screen
+    ui.render(screen)
+    start = time.perf_counter()
+    for _ in range(frames):
+        ui.render(screen)
+    idle_render_time = time.perf_counter() - start
+
+    # scripted mouse stream
+    mouse_events = mouse_script(event_count, rng)
+    start = time.perf_counter()
+    for event in mouse_events:
+        ui.handle_event(event)
+    mouse_time = time.perf_counter() - start
+    close_modal(ui)
+
+    # same stream as one batch, consecutive motions are coalesced
+    start = time.perf_counter()
+    ui.process_events(mouse_events)
+    batched_mouse_time = time.perf_counter() - start
+    close_modal(ui)
+
+    # scripted typing into a focused TextInput
+    text_input = next(c for page in root.children for c in page.children if isinstance(c, TextInput))
+    ui.focused = text_input
+    text_input.on_focus()
+    key_events = keyboard_script(event_count, rng)
+    start = time.perf_counter()
+    for event in key_events:
+        ui.handle_event(event)
+    keyboard_time = time.perf_counter() - start
+
+    return {
+        "nodes": count_nodes(root),
+        "construction_s": construction,
+        "draw_fps": rate(frames, draw_time),
+        "idle_render_fps": rate(frames, idle_render_time),
+        "mouse_events_per_s": rate(len(mouse_events), mouse_time),
+        "batched_mouse_events_per_s": rate(len(mouse_events), batched_mouse_time),
+        "keyboard_events_per_s": rate(len(key_events), keyboard_time),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="target node counts")
+    parser.add_argument("--frames", type=int, default=30, help="frames per draw measurement")
+    parser.add_argument("--events", type=int, default=2000, help="events per event stream")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+
+    results = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "frames": args.frames,
+        "events": args.events,
+        "runs": [bench_size(screen, size, args.frames, args.events, args.seed) for size in args.sizes],
+    }
+    pygame.quit()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
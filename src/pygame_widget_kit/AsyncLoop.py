@@ -0,0 +1,62 @@
+import asyncio
+import time
+import pygame
+
+
+DEFAULT_FPS = 60
+# wake-ups per second while there is no input and nothing to redraw
+DEFAULT_IDLE_FPS = 10
+
+
+class AsyncLoop:
+    # Runs event pumping, ui.update() and ui.render() as a coroutine, so the
+    # UI shares one asyncio loop with network clients. Frames with input or
+    # dirty widgets run at fps, an idle screen only wakes idle_fps times per
+    # second or earlier when a UIManager timer is due (next_wakeup). Between
+    # frames the loop awaits asyncio.sleep, never busy-waits.
+    def __init__(self, ui_manager, surface=None, fps=DEFAULT_FPS, idle_fps=DEFAULT_IDLE_FPS):
+        self.ui_manager = ui_manager
+        self.surface = surface  # None: pygame.display.get_surface()
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.running = False
+        self.on_event = None  # called with every pygame event before the UI gets it
+
+    def stop(self):
+        self.running = False
+
+    def step(self):
+        # one frame, returns True if there was input or something was drawn
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            if self.on_event is not None:
+                self.on_event(event)
+        if events:
+            self.ui_manager.process_events(events)
+
+        self.ui_manager.update()
+
+        surface = self.surface or pygame.display.get_surface()
+        rects = self.ui_manager.render(surface)
+        if rects:
+            pygame.display.update(rects)
+        return bool(events or rects)
+
+    async def run(self):
+        self.running = True
+        while self.running:
+            start = time.perf_counter()
+            busy = self.step()
+            interval = 1 / self.fps
+            if not busy:
+                wakeup = self.ui_manager.next_wakeup()
+                idle = 1 / self.idle_fps
+                interval = max(interval, idle if wakeup is None else min(wakeup, idle))
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+
+async def run_ui(ui_manager, surface=None, fps=DEFAULT_FPS, idle_fps=DEFAULT_IDLE_FPS):
+    # asyncio.run(run_ui(ui, screen)) until the window is closed
+    await AsyncLoop(ui_manager, surface, fps, idle_fps).run()
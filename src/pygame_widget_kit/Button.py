@@ -2,37 +2,13 @@ import pygame
 from .Text import *
 from .UIComponent import *
 from functools import partial
-import tkinter as tk
-from tkinter import filedialog
-
-
-import multiprocessing
-
-
-def file_choser_process(queue):
-    try:
-        root = tk.Tk()
-        root.withdraw() 
-        
-        root.attributes('-topmost', True)
-        
-        root.lift()
-        root.focus_force()
-        
-        dosya_yolu = filedialog.askopenfilename(
-            title="Chose File",
-            filetypes=[("Tüm Dosyalar", "*.*")]
-        )
-        
-        queue.put(dosya_yolu)
-        
-        root.destroy()
-    except Exception as e:
-        queue.put(None) 
+from . import Draw
 
 
 
 class Button(UIComponent):
+    __slots__ = ("text_str", "size", "text_color", "padding", "text", "click_function")
+
     def __init__(self, text_str = "Button",
                 pos = (0,0),
                 size = (200,40),
@@ -71,9 +47,9 @@ class Button(UIComponent):
             color=self.hover_color
 
         if color is not None:
-            pygame.draw.rect(surface,color,self.absolute_rect,0)
+            Draw.rect(surface,color,self.absolute_rect,0)
         if self.border_color:
-            pygame.draw.rect(surface,self.border_color,self.absolute_rect,2)
+            Draw.rect(surface,self.border_color,self.absolute_rect,2)
 
 
         self.text.draw(surface)
@@ -88,7 +64,7 @@ class Button(UIComponent):
 
     def on_click(self, event):
         if self.click_function is not None:
-            self.click_function()
+            run_callback(self.click_function)
         else:
             #print("Button clicked")
             pass
@@ -97,36 +73,49 @@ class Button(UIComponent):
 
 
 class ChooseFileButton(Button):
-    def __init__(self, text_str="Button", pos=(0, 0), size=(200, 40), style=None, z_index=0, color=(175, 175, 175), border_color=(100, 100, 100), hover_color=(150, 150, 150), text_color=(0, 0, 0), padding=(20, 10)):
+    # the dialog runs in a shared helper process (see FileDialog.py)
+    __slots__ = ("chosen_file_path", "asynchronous", "waiting_for_file")
+
+    def __init__(self, text_str="Button", pos=(0, 0), size=(200, 40), style=None, z_index=0, color=(175, 175, 175), border_color=(100, 100, 100), hover_color=(150, 150, 150), text_color=(0, 0, 0), padding=(20, 10), asynchronous=False):
         super().__init__(text_str, pos, size, style, z_index, color, border_color, hover_color, text_color, padding)
     
         self.chosen_file_path = None
+
+        # asynchronous: on_click returns at once, UIManager.update() delivers the path
+        self.asynchronous = asynchronous
+        self.waiting_for_file = False
     
     def on_click(self, event):
-        #print("Dosya seçici ayrı işlemde başlatılıyor...")
-                        
-        q = multiprocessing.Queue()
-        
-        p = multiprocessing.Process(target=file_choser_process, args=(q,))
-        
-        p.start()
-        p.join()
-        if not q.empty():
-            sonuc = q.get()
-            if sonuc: 
-                secilen_dosya = sonuc
-                #print(f"Gelen dosya: {secilen_dosya}")
-                self.chosen_file_path = secilen_dosya
-                self.text.set_text(secilen_dosya)
-                if self.click_function is not None:
-                    self.click_function()
-                else:
-                    #print("islem iptal")
-                    pass
-        else:
-            #print("İşlem iptal edildi veya hata oluştu.")
-            pass
+        # imported here so multiprocessing is only loaded when a dialog is opened
+        from .FileDialog import get_file_dialog_service
+        service = get_file_dialog_service()
+        if self.asynchronous:
+            if not self.waiting_for_file:
+                self.waiting_for_file = True
+                service.request(self)
+                self._update_polling()
+            return
 
-        
-        
-    
\ No newline at end of file
+        self.on_file_chosen(service.ask())
+
+    def needs_poll(self):
+        # polled only while a dialog is open
+        return self.waiting_for_file
+
+    def _update_polling(self):
+        if self.ui_manager is not None:
+            self.ui_manager.update_polling(self)
+
+    def poll(self):
+        if self.waiting_for_file:
+            from .FileDialog import get_file_dialog_service
+            get_file_dialog_service().poll()
+
+    def on_file_chosen(self, path):
+        self.waiting_for_file = False
+        self._update_polling()
+        if path: 
+            self.chosen_file_path = path
+            self.text.set_text(path)
+            if self.click_function is not None:
+                run_callback(self.click_function)
@@ -0,0 +1,35 @@
+import pygame
+
+
+# pygame.draw wrappers used by the widgets. Listeners (the profiler) are
+# called with the primitive name, so only the kit's own drawing is counted.
+_listeners = []
+
+
+def add_draw_listener(listener):
+    _listeners.append(listener)
+
+
+def remove_draw_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _counted(name):
+    func = getattr(pygame.draw, name)
+
+    def draw(*args, **kwargs):
+        for listener in _listeners:
+            listener(name)
+        return func(*args, **kwargs)
+
+    draw.__name__ = name
+    return draw
+
+
+rect = _counted("rect")
+circle = _counted("circle")
+polygon = _counted("polygon")
+line = _counted("line")
+lines = _counted("lines")
+ellipse = _counted("ellipse")
@@ -0,0 +1,109 @@
+import multiprocessing
+import queue
+from collections import deque
+
+
+def file_dialog_worker(requests, results):
+    # runs in the helper process, keeps one hidden Tk root alive between dialogs
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        try:
+            root.attributes('-topmost', True)
+            root.lift()
+            root.focus_force()
+
+            path = filedialog.askopenfilename(
+                title="Chose File",
+                filetypes=[("Tüm Dosyalar", "*.*")]
+            )
+            results.put(path)
+        except Exception:
+            results.put(None)
+
+    root.destroy()
+
+
+class FileDialogService:
+    # One warm helper process shared by every ChooseFileButton. Spawning an
+    # interpreter per click costs hundreds of milliseconds, so the process is
+    # started on first use and reused. Results come back in request order.
+    def __init__(self):
+        self._process = None
+        self._requests = None
+        self._results = None
+        self._waiting = deque()  # owners of the pending requests, None = blocking call
+
+    def _ensure_process(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        self._requests = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=file_dialog_worker,
+            args=(self._requests, self._results),
+            daemon=True,
+        )
+        self._process.start()
+
+    def request(self, owner):
+        # owner.on_file_chosen(path) is called from poll() when the dialog closes
+        self._ensure_process()
+        self._waiting.append(owner)
+        self._requests.put("open")
+
+    def _deliver(self, path):
+        owner = self._waiting.popleft()
+        if owner is not None:
+            owner.on_file_chosen(path)
+        return owner
+
+    def poll(self):
+        while self._waiting:
+            try:
+                path = self._results.get_nowait()
+            except queue.Empty:
+                if not self._process.is_alive():
+                    # helper died, cancel everything that was waiting
+                    while self._waiting:
+                        self._deliver(None)
+                return
+            self._deliver(path)
+
+    def ask(self):
+        # blocking variant, earlier asynchronous requests are delivered first
+        self.request(None)
+        while True:
+            try:
+                path = self._results.get(timeout=0.1)
+            except queue.Empty:
+                if self._process.is_alive():
+                    continue
+                path = None
+            if self._waiting[0] is None:
+                self._waiting.popleft()
+                return path
+            self._deliver(path)
+
+    def shutdown(self):
+        if self._process is not None and self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=1)
+        self._process = None
+
+
+_service = None
+
+
+def get_file_dialog_service():
+    global _service
+    if _service is None:
+        _service = FileDialogService()
+    return _service
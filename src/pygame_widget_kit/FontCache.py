@@ -0,0 +1,43 @@
+import pygame
+from collections import OrderedDict
+
+
+DEFAULT_FONT_CACHE_SIZE = 32
+
+# (font_type, font_size, bold, italic) -> pygame.font.Font, least recently used first
+_fonts = OrderedDict()
+_max_fonts = DEFAULT_FONT_CACHE_SIZE
+
+
+def get_font(font_type, font_size, bold=False, italic=False):
+    # SysFont looks the font up on the system and loads the file on every call,
+    # widgets share one Font object per style instead
+    key = (font_type, font_size, bold, italic)
+    font = _fonts.get(key)
+    if font is not None:
+        _fonts.move_to_end(key)
+        return font
+
+    font = pygame.font.SysFont(font_type, font_size, bold, italic)
+    _fonts[key] = font
+    while len(_fonts) > _max_fonts:
+        _fonts.popitem(last=False)
+    return font
+
+
+def preload_fonts(font_specs):
+    # font_specs: iterable of (font_type, font_size) or (font_type, font_size, bold, italic)
+    for spec in font_specs:
+        get_font(*spec)
+
+
+def set_font_cache_size(max_fonts):
+    global _max_fonts
+    _max_fonts = max(1, max_fonts)
+    while len(_fonts) > _max_fonts:
+        _fonts.popitem(last=False)
+
+
+def clear_font_cache():
+    # call after pygame.font.quit(), cached Font objects are invalid afterwards
+    _fonts.clear()
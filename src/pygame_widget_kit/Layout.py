@@ -0,0 +1,259 @@
+from .Widget import Widget
+
+
+ALIGN_START = "start"
+ALIGN_CENTER = "center"
+ALIGN_END = "end"
+ALIGN_STRETCH = "stretch"
+
+
+def stack_offsets(sizes, spacing=0, start=0):
+    # start offset of each item when items of the given sizes are stacked on one axis
+    offsets = []
+    pos = start
+    for size in sizes:
+        offsets.append(pos)
+        pos += size + spacing
+    return offsets
+
+
+def _align(align, size, available):
+    # (offset, size) of an item inside `available` pixels on the cross axis
+    if align == ALIGN_STRETCH:
+        return 0, available
+    if align == ALIGN_CENTER:
+        return (available - size) // 2, size
+    if align == ALIGN_END:
+        return available - size, size
+    return 0, size
+
+
+class LayoutContainer(Widget):
+    # Base of Row, Column, Grid and Stack. Children are positioned in two
+    # passes: measure() returns the preferred size (cached until the subtree
+    # changes) and layout() places the children inside the current rect.
+    # invalidate_layout() bubbles up to the outermost container, UIManager
+    # runs the pending layouts before hit testing and drawing.
+    __slots__ = ("padding", "spacing", "align", "layout_children", "_child_options",
+                 "_layout_valid", "_arranged_size", "_measure_cache")
+    lays_out_children = True
+
+    def __init__(self, rect, padding=0, spacing=0, align=ALIGN_START,
+                 z_index=0, color=None, border_color=None, hover_color=None):
+        super().__init__(rect, z_index=z_index, color=color, border_color=border_color, hover_color=hover_color)
+        self.padding = padding if isinstance(padding, (tuple, list)) else (padding, padding)
+        self.spacing = spacing
+        self.align = align
+
+        self.layout_children = []   # insertion order, children itself is sorted by z_index
+        self._child_options = {}    # child -> [flex, align, preferred size, size set by the layout]
+
+        self._layout_valid = False
+        self._arranged_size = None
+        self._measure_cache = {}
+
+    def add_child(self, component, flex=0, align=None):
+        self.layout_children.append(component)
+        self._child_options[component] = [flex, align or self.align, (component.rect[2], component.rect[3]), None]
+        super().add_child(component)
+        self.invalidate_layout()
+
+    def remove_child(self, component):
+        if component.parent is not self:
+            return
+        super().remove_child(component)
+        self.layout_children.remove(component)
+        del self._child_options[component]
+        self.invalidate_layout()
+
+    def invalidate_layout(self):
+        self._measure_cache.clear()
+        if not self._layout_valid:
+            # already waiting for a layout pass
+            return
+        self._layout_valid = False
+        if self.parent is not None and self.parent.lays_out_children:
+            self.parent.invalidate_layout()
+        elif self.ui_manager is not None:
+            self.ui_manager._pending_layouts[self] = None
+
+    # -------------------------
+    # MEASURE
+    # -------------------------
+    def measure(self, available_width, available_height):
+        key = (available_width, available_height)
+        size = self._measure_cache.get(key)
+        if size is None:
+            size = self._measure_cache[key] = self._measure(available_width, available_height)
+        return size
+
+    def _measure(self, available_width, available_height):
+        return self.rect[2], self.rect[3]
+
+    def _measure_child(self, child, available_width, available_height):
+        if child.lays_out_children:
+            return child.measure(available_width, available_height)
+        # a stretched child keeps its preferred size unless it resized itself since
+        options = self._child_options[child]
+        size = (child.rect[2], child.rect[3])
+        if size != options[3]:
+            options[2] = size
+        return options[2]
+
+    def _visible_children(self):
+        return [child for child in self.layout_children if child.visible]
+
+    def _inner_size(self, width, height):
+        return max(0, width - 2 * self.padding[0]), max(0, height - 2 * self.padding[1])
+
+    # -------------------------
+    # ARRANGE
+    # -------------------------
+    def layout(self):
+        size = (self.rect[2], self.rect[3])
+        if self._layout_valid and self._arranged_size == size:
+            return
+        self._arrange(size[0], size[1])
+        self._layout_valid = True
+        self._arranged_size = size
+
+    def _arrange(self, width, height):
+        pass
+
+    def _place(self, child, x, y, width, height):
+        # set_size invalidates the child's cached images and nested layouts; its
+        # invalidate_layout stops here, this container is still being arranged
+        x, y, width, height = int(round(x)), int(round(y)), int(round(width)), int(round(height))
+        self._child_options[child][3] = (width, height)
+        if tuple(child.rect[:2]) != (x, y):
+            child.set_pos(x, y)
+        child.set_size(width, height)
+        if child.lays_out_children:
+            child.layout()
+
+
+class _BoxLayout(LayoutContainer):
+    __slots__ = ()
+    axis = 0  # 0: children left to right, 1: top to bottom
+
+    def _measure(self, available_width, available_height):
+        inner = self._inner_size(available_width, available_height)
+        main = cross = 0
+        children = self._visible_children()
+        for child in children:
+            size = self._measure_child(child, inner[0], inner[1])
+            main += size[self.axis]
+            cross = max(cross, size[1 - self.axis])
+        if children:
+            main += self.spacing * (len(children) - 1)
+
+        padding = self.padding
+        if self.axis == 0:
+            return main + 2 * padding[0], cross + 2 * padding[1]
+        return cross + 2 * padding[0], main + 2 * padding[1]
+
+    def _arrange(self, width, height):
+        axis = self.axis
+        inner = self._inner_size(width, height)
+        children = self._visible_children()
+        if not children:
+            return
+
+        sizes = [self._measure_child(child, inner[0], inner[1]) for child in children]
+        used = sum(size[axis] for size in sizes) + self.spacing * (len(children) - 1)
+        free = max(0, inner[axis] - used)
+        total_flex = sum(self._child_options[child][0] for child in children)
+
+        pos = self.padding[axis]
+        for child, size in zip(children, sizes):
+            flex, align = self._child_options[child][:2]
+            main = size[axis] + (free * flex / total_flex if total_flex else 0)
+            cross_offset, cross = _align(align, size[1 - axis], inner[1 - axis])
+            cross_offset += self.padding[1 - axis]
+
+            if axis == 0:
+                self._place(child, pos, cross_offset, main, cross)
+            else:
+                self._place(child, cross_offset, pos, cross, main)
+            pos += main + self.spacing
+
+
+class Row(_BoxLayout):
+    __slots__ = ()
+    axis = 0
+
+
+class Column(_BoxLayout):
+    __slots__ = ()
+    axis = 1
+
+
+class Grid(LayoutContainer):
+    # fixed number of equally wide columns, each row as high as its tallest cell
+    __slots__ = ("columns",)
+
+    def __init__(self, rect, columns, padding=0, spacing=0, align=ALIGN_START,
+                 z_index=0, color=None, border_color=None, hover_color=None):
+        super().__init__(rect, padding, spacing, align, z_index, color, border_color, hover_color)
+        self.columns = max(1, columns)
+
+    def _rows(self, sizes):
+        return [sizes[i:i + self.columns] for i in range(0, len(sizes), self.columns)]
+
+    def _measure(self, available_width, available_height):
+        inner = self._inner_size(available_width, available_height)
+        children = self._visible_children()
+        sizes = [self._measure_child(child, inner[0], inner[1]) for child in children]
+        if not sizes:
+            return 2 * self.padding[0], 2 * self.padding[1]
+
+        rows = self._rows(sizes)
+        cell_width = max(size[0] for size in sizes)
+        width = cell_width * self.columns + self.spacing * (self.columns - 1)
+        height = sum(max(size[1] for size in row) for row in rows) + self.spacing * (len(rows) - 1)
+        return width + 2 * self.padding[0], height + 2 * self.padding[1]
+
+    def _arrange(self, width, height):
+        inner = self._inner_size(width, height)
+        children = self._visible_children()
+        if not children:
+            return
+
+        cell_width = (inner[0] - self.spacing * (self.columns - 1)) / self.columns
+        sizes = [self._measure_child(child, cell_width, inner[1]) for child in children]
+
+        y = self.padding[1]
+        for row_start in range(0, len(children), self.columns):
+            row_sizes = sizes[row_start:row_start + self.columns]
+            row_height = max(size[1] for size in row_sizes)
+            for column, size in enumerate(row_sizes):
+                child = children[row_start + column]
+                align = self._child_options[child][1]
+                x_offset, w = _align(align, size[0], cell_width)
+                y_offset, h = _align(align, size[1], row_height)
+                x = self.padding[0] + column * (cell_width + self.spacing) + x_offset
+                self._place(child, x, y + y_offset, w, h)
+            y += row_height + self.spacing
+
+
+class Stack(LayoutContainer):
+    # children overlap inside the padded area, aligned on both axes
+    __slots__ = ()
+
+    def _measure(self, available_width, available_height):
+        inner = self._inner_size(available_width, available_height)
+        width = height = 0
+        for child in self._visible_children():
+            size = self._measure_child(child, inner[0], inner[1])
+            width = max(width, size[0])
+            height = max(height, size[1])
+        return width + 2 * self.padding[0], height + 2 * self.padding[1]
+
+    def _arrange(self, width, height):
+        inner = self._inner_size(width, height)
+        for child in self._visible_children():
+            size = self._measure_child(child, inner[0], inner[1])
+            align = self._child_options[child][1]
+            x_offset, w = _align(align, size[0], inner[0])
+            y_offset, h = _align(align, size[1], inner[1])
+            self._place(child, self.padding[0] + x_offset, self.padding[1] + y_offset, w, h)
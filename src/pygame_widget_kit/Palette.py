@@ -0,0 +1,43 @@
+from functools import lru_cache
+
+
+# Colors are interned: equal colors share one tuple object, and derived
+# hover/active shades are computed once per base color instead of per widget.
+
+@lru_cache(maxsize=1024)
+def _intern(color):
+    return color
+
+
+def intern_color(color):
+    if not isinstance(color, (tuple, list)):
+        return color
+    return _intern(tuple(color))
+
+
+@lru_cache(maxsize=1024)
+def _lighten(color, amount):
+    return _intern(tuple(min(c + amount, 255) for c in color))
+
+
+@lru_cache(maxsize=1024)
+def _darken(color, amount):
+    return _intern(tuple(max(c - amount, 0) for c in color))
+
+
+def lighten_color(color, amount=30):
+    return _lighten(tuple(color), amount)
+
+
+def darken_color(color, amount=40):
+    return _darken(tuple(color), amount)
+
+
+@lru_cache(maxsize=1024)
+def _dim(color):
+    return _intern(tuple(c // 2 for c in color))
+
+
+def dim_color(color):
+    # look of disabled components
+    return _dim(tuple(color))
@@ -0,0 +1,168 @@
+import time
+from collections import deque
+
+import pygame
+from .UIComponent import UIComponent
+from .FontCache import get_font
+from .TextRenderer import set_render_listener, get_render_listener
+from . import Draw
+
+
+class FrameStats:
+    def __init__(self, index):
+        self.index = index
+        self.duration = 0.0
+
+        # seconds spent in each phase
+        self.times = {"draw": 0.0, "handle_event": 0.0, "hit_test": 0.0, "text_render": 0.0}
+        # per-frame counters (font renders, rect draws, ...)
+        self.counters = {"font_renders": 0, "rect_draws": 0, "component_draws": 0, "events": 0, "hit_tests": 0}
+        # component -> {"draw": seconds, "handle_event": seconds}, draw is self time
+        self.components = {}
+
+    def add_component_time(self, component, kind, seconds):
+        entry = self.components.get(component)
+        if entry is None:
+            entry = self.components[component] = {"draw": 0.0, "handle_event": 0.0}
+        entry[kind] += seconds
+
+    def top_components(self, n=10):
+        # most expensive components of this frame as (component, seconds)
+        totals = [(component, sum(entry.values())) for component, entry in self.components.items()]
+        totals.sort(key=lambda item: item[1], reverse=True)
+        return totals[:n]
+
+
+class FrameProfiler:
+    # Opt-in instrumentation used by UIManager.enable_profiling(). Timings
+    # recorded between two UIManager.render() calls belong to one frame;
+    # finished frames go to a ring buffer and to the optional callback.
+    def __init__(self, history=120, callback=None):
+        self.frames = deque(maxlen=history)
+        self.callback = callback
+
+        self._frame_index = 0
+        self._frame_start = time.perf_counter()
+        self.current = FrameStats(self._frame_index)
+
+        self._draw_stack = []
+
+    # -------------------------
+    # INSTALL
+    # -------------------------
+    def install(self):
+        # "<name>_draws" counters come from the kit's own draw calls (Draw.py),
+        # drawing done by the application is not counted
+        set_render_listener(self._on_text_render)
+        Draw.add_draw_listener(self._on_draw)
+
+    def uninstall(self):
+        Draw.remove_draw_listener(self._on_draw)
+        # another profiler may have installed its own listener since
+        if get_render_listener() == self._on_text_render:
+            set_render_listener(None)
+
+    def _on_draw(self, name):
+        self.count(name + "_draws")
+
+    def _on_text_render(self, seconds):
+        self.current.counters["font_renders"] += 1
+        self.current.times["text_render"] += seconds
+
+    # -------------------------
+    # RECORDING
+    # -------------------------
+    def begin_draw(self, component):
+        self._draw_stack.append([component, time.perf_counter(), 0.0])
+
+    def end_draw(self):
+        component, start, children_time = self._draw_stack.pop()
+        elapsed = time.perf_counter() - start
+        if self._draw_stack:
+            self._draw_stack[-1][2] += elapsed
+        self.current.add_component_time(component, "draw", elapsed - children_time)
+        self.current.counters["component_draws"] += 1
+
+    def add_time(self, kind, seconds):
+        self.current.times[kind] += seconds
+
+    def add_event_time(self, component, seconds):
+        self.current.add_component_time(component, "handle_event", seconds)
+
+    def count(self, name, n=1):
+        counters = self.current.counters
+        counters[name] = counters.get(name, 0) + n
+
+    def end_frame(self):
+        now = time.perf_counter()
+        frame = self.current
+        frame.duration = now - self._frame_start
+        self.frames.append(frame)
+
+        self._frame_index += 1
+        self._frame_start = now
+        self.current = FrameStats(self._frame_index)
+
+        if self.callback is not None:
+            self.callback(frame)
+        return frame
+
+    def last_frame(self):
+        return self.frames[-1] if self.frames else None
+
+
+class ProfilerOverlay(UIComponent):
+    # debug panel listing the most expensive components of the last frame
+    __slots__ = ("top_n", "text_color", "bg_color", "font", "_shown_frame")
+    polls = True
+
+    def __init__(self, rect, top_n=8, font_size=18, font_type='Veranda',
+                 text_color=(255, 255, 255), bg_color=(0, 0, 0, 180), z_index=1000):
+        super().__init__(rect, z_index=z_index, color=None, border_color=None)
+        self.top_n = top_n
+        self.text_color = text_color
+        self.bg_color = bg_color
+        self.font = get_font(font_type, font_size)
+        self._shown_frame = None
+
+    def poll(self):
+        profiler = self.ui_manager.profiler if self.ui_manager is not None else None
+        frame = profiler.last_frame() if profiler is not None else None
+        if frame is not self._shown_frame:
+            self.mark_dirty()
+
+    def _lines(self, frame):
+        if frame is None:
+            return ["profiling disabled"]
+        lines = [
+            f"frame {frame.index}: {frame.duration * 1000:.2f} ms",
+            "draw {draw:.2f} ms  events {handle_event:.2f} ms  hit {hit_test:.2f} ms".format(
+                **{k: v * 1000 for k, v in frame.times.items()}),
+            "font renders {font_renders}  rect draws {rect_draws}".format(**frame.counters),
+        ]
+        for component, seconds in frame.top_components(self.top_n):
+            lines.append(f"{type(component).__name__}@{id(component):x}: {seconds * 1000:.3f} ms")
+        return lines
+
+    def can_use_surface_cache(self):
+        # shows a different frame every time
+        return False
+
+    def draw(self, surface):
+        if not self.visible:
+            return
+
+        profiler = self.ui_manager.profiler if self.ui_manager is not None else None
+        frame = profiler.last_frame() if profiler is not None else None
+        self._shown_frame = frame
+
+        panel = pygame.Surface(self.absolute_rect[2:], pygame.SRCALPHA)
+        panel.fill(self.bg_color)
+        surface.blit(panel, self.absolute_rect[:2])
+
+        x = self.absolute_rect[0] + 4
+        y = self.absolute_rect[1] + 4
+        for line in self._lines(frame):
+            # rendered directly so the overlay does not show up in its own counters
+            surface.blit(self.font.render(line, True, self.text_color), (x, y))
+            y += self.font.get_linesize()
@@ -2,8 +2,15 @@ import pygame
 from .UIComponent import *
 from .Widget import *
 from .Button import *
+from .Layout import stack_offsets
+from . import Draw
 
 class Radio(Widget):
+    __slots__ = (
+        "options_text", "selected_index", "item_height", "spacing", "check_color",
+        "text_color", "options",
+    )
+
     def __init__(
         self,
         rect,
@@ -26,6 +33,7 @@ class Radio(Widget):
         self.spacing = spacing
 
         self.color = color
+        self.hover_color = color
         self.border_color = border_color
         self.check_color = check_color
 
@@ -35,9 +43,9 @@ class Radio(Widget):
         self._build_options()
 
     def _build_options(self):
-        y = 0
+        offsets = stack_offsets([self.item_height] * len(self.options_text), self.spacing)
 
-        for i, text in enumerate(self.options_text):
+        for i, (text, y) in enumerate(zip(self.options_text, offsets)):
             opt = RadioOption(
                 rect=(0, y, self.rect[2], self.item_height),
                 index=i,
@@ -50,9 +58,7 @@ class Radio(Widget):
             )
             self.options.append(opt)
             self.add_child(opt)
-            
 
-            y += self.item_height + self.spacing
     def get_value(self):
         if not self.options_text:
             return None
@@ -61,6 +67,8 @@ class Radio(Widget):
     def set_index(self, index):
         if 0 <= index < len(self.options_text):
             self.selected_index = index
+            for opt in self.options:
+                opt.mark_dirty()
 
     def handle_event(self, event):
         if not self.visible or not self.enabled:
@@ -72,6 +80,8 @@ class Radio(Widget):
 
             
 class RadioOption(Button):
+    __slots__ = ("radio", "index", "check_color", "circle_radius", "circle_center_offset")
+
     def __init__(
         self,
         rect,
@@ -108,18 +118,21 @@ class RadioOption(Button):
 
         # hover background
         if self.hovered:
-            pygame.draw.rect(surface, (60, 60, 60), self.absolute_rect, 0)
+            Draw.rect(surface, (60, 60, 60), self.absolute_rect, 0)
 
         # outer circle
-        pygame.draw.circle(surface, self.border_color, (cx, cy), self.circle_radius, 2)
+        Draw.circle(surface, self.border_color, (cx, cy), self.circle_radius, 2)
 
         # inner dot
         if self.radio.selected_index == self.index:
-            pygame.draw.circle(surface, self.check_color, (cx, cy), self.circle_radius - 4)
+            Draw.circle(surface, self.check_color, (cx, cy), self.circle_radius - 4)
 
         self.text.draw(surface)
     
+    def visual_state(self):
+        return super().visual_state() + (self.radio.selected_index == self.index,)
+
     def on_click(self, event):
-        self.radio.selected_index = self.index
+        self.radio.set_index(self.index)
         if self.click_function is not None:
-            self.click_function()
+            run_callback(self.click_function)
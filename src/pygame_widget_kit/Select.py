@@ -1,23 +1,124 @@
 import pygame
-from .UIComponent import UIComponent
+from .UIComponent import UIComponent, run_callback
 from .Text import Text
 from .Button import *
+from .Layout import stack_offsets
 from functools import partial
+from bisect import bisect_left, bisect_right, insort
+import time
+from . import Draw
 
 
 
+# dropdown rows that exist at once, longer lists are scrolled
+DEFAULT_MAX_VISIBLE_OPTIONS = 8
+SCROLLBAR_WIDTH = 6
+# seconds between keys that still extend the type-ahead prefix
+TYPEAHEAD_TIMEOUT = 1.0
+
+
+class OptionIndex:
+    # Options sorted by casefolded text as (key, raw index) pairs. Every
+    # option starting with a prefix is one contiguous range found with two
+    # bisects, so type-ahead and filtering cost O(log n) per keystroke.
+    # Removed raw indices are recorded in _removed and subtracted when an
+    # index is read, so a removal does not renumber the other entries.
+    def __init__(self, options=()):
+        self._keys = sorted((str(option).casefold(), i) for i, option in enumerate(options))
+        self._removed = []  # sorted raw indices of removed options
+        self._next_raw = len(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _to_index(self, raw):
+        return raw - bisect_left(self._removed, raw)
+
+    def _to_raw(self, index):
+        # smallest raw with `index` live raws before it
+        removed = self._removed
+        lo, hi = index, index + len(removed)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mid - bisect_right(removed, mid) < index:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def append(self, option):
+        insort(self._keys, (str(option).casefold(), self._next_raw))
+        self._next_raw += 1
+
+    def remove(self, index, option):
+        raw = self._to_raw(index)
+        del self._keys[bisect_left(self._keys, (str(option).casefold(), raw))]
+        insort(self._removed, raw)
+        if len(self._removed) > len(self._keys):
+            self._compact()
+
+    def _compact(self):
+        # renumber once the removals outnumber the options, amortized O(log n) per removal;
+        # raw -> index is monotonic, so the order of the keys is unchanged
+        self._keys = [(key, self._to_index(raw)) for key, raw in self._keys]
+        self._removed = []
+        self._next_raw = len(self._keys)
+
+    def position_of(self, index, option):
+        return bisect_left(self._keys, (str(option).casefold(), self._to_raw(index)))
+
+    def index_at(self, position):
+        return self._to_index(self._keys[position][1])
+
+    def prefix_range(self, prefix):
+        # [lo, hi) positions of the options starting with prefix
+        prefix = prefix.casefold()
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + "\U0010ffff",), lo)
+        return lo, hi
+
+    def find(self, prefix, current_index=None, current_option=None, cycle=False):
+        # first match alphabetically; the current option is kept if it matches,
+        # with cycle=True the match after it is returned instead
+        lo, hi = self.prefix_range(prefix)
+        if lo == hi:
+            return None
+        if current_index is not None:
+            position = self.position_of(current_index, current_option)
+            if lo <= position < hi:
+                if not cycle:
+                    return current_index
+                return self.index_at(position + 1 if position + 1 < hi else lo)
+        return self.index_at(lo)
+
+
 class SelectOption(Button):
-    def __init__(self,value:str, rect, parent_select:"Select", color=(200,200,200),border_color = (127,127,127)):
+    # one dropdown row, recycled for whichever option is scrolled into it
+    __slots__ = ("value", "index", "parent_select")
+
+    def __init__(self,value:str, rect, parent_select:"Select", color=(200,200,200),border_color = (127,127,127), index=0):
         super().__init__(text_str=value,pos=(rect[0],rect[1]),size=(rect[2],rect[3]), color=color,padding=(5,5),text_color=(0,0,0),border_color=border_color)
         self.value = value
+        self.index = index
         self.parent_select = parent_select
 
+    def set_option(self, index, value):
+        self.index = index
+        self.value = value
+        self.text.set_text(value)
+
+    def handle_event(self, event):
+        # scroll and keys belong to the select, rows keep focus after a click
+        if event.type in (pygame.MOUSEWHEEL, pygame.KEYDOWN):
+            self.parent_select.handle_event(event)
+            return
+        super().handle_event(event)
 
     def on_click(self, event):
-        self.parent_select.set_value(self.value)
+        self.parent_select.set_index(self.index)
         self.parent_select.close()
         if self.click_function:
-            self.click_function()
+            run_callback(self.click_function)
 
 
 
@@ -25,6 +126,12 @@ class SelectOption(Button):
 
 
 class Select(UIComponent):
+    __slots__ = (
+        "options", "is_open", "selected_value", "selected_index", "text", "option_height",
+        "option_components", "on_option_change", "max_visible_options", "scroll_offset",
+        "filterable", "filter_text", "_option_index", "_filter_range", "_typeahead", "_typeahead_at",
+    )
+
     def __init__(
         self,
         rect,
@@ -33,13 +140,24 @@ class Select(UIComponent):
         color=(180,180,180),
         hover_color=(200,200,200),
         border_color = (0,255,0),
-        z_index = 0
+        z_index = 0,
+        max_visible_options = DEFAULT_MAX_VISIBLE_OPTIONS,
+        filterable = False
     ):
         super().__init__(rect, color=color, hover_color=hover_color,border_color=border_color,z_index=z_index)
 
-        self.options = options
+        self.options = list(options)
         self.is_open = False
-        self.selected_value = options[default_index] 
+        self.selected_index = default_index
+        self.selected_value = self.options[default_index] if self.options else ""
+
+        # keyboard: type-ahead; when filterable, typing while open narrows the list
+        self.filterable = filterable
+        self.filter_text = ""
+        self._option_index = None
+        self._filter_range = None
+        self._typeahead = ""
+        self._typeahead_at = 0.0
 
         # Görünen text
         self.text = Text(
@@ -49,10 +167,12 @@ class Select(UIComponent):
         )
         self.add_child(self.text)
 
-        # Dropdown option container
+        # dropdown: only the visible rows exist, they are reused while scrolling
         self.option_height = rect[3]
+        self.max_visible_options = max_visible_options
+        self.scroll_offset = 0
         self.option_components:list[SelectOption] = []
-        self.add_all_options()
+        self._build_rows()
 
         self.on_option_change = None
     
@@ -67,35 +187,225 @@ class Select(UIComponent):
             self.open()
 
 
-    def add_all_options(self):
+    def _build_rows(self):
+        for opt in self.option_components:
+            self.remove_child(opt)
+        self.option_components = []
+
         base_x, base_y, w, h = self.rect
+        row_count = min(len(self.options), self.max_visible_options)
 
-        for i, value in enumerate(self.options):
+        # the list starts right under the select box
+        offsets = stack_offsets([h] * row_count, start=h)
+        for i, y in enumerate(offsets):
             opt_rect = (
                 0,
-                h * (i + 1),
+                y,
                 w,
                 h
             )
 
             opt = SelectOption(
-                value,
+                self.options[i],
                 opt_rect,
                 parent_select=self,
-                color=(220,220,220)
+                color=(220,220,220),
+                index=i
             )
             opt.z_index = self.z_index + 1
+            opt.visible = False
             self.add_child(opt)
             self.option_components.append(opt)
-            opt.visible = False
+        self._refresh_rows()
+
+    def set_options(self, options:list[str], default_index=0):
+        self.options = list(options)
+        self._option_index = None
+        self._options_changed()
+        if self.options:
+            self.set_index(default_index)
+        else:
+            self.selected_index = 0
+            self.selected_value = ""
+            self._update_text()
+
+    def add_option(self, value):
+        self.options.append(value)
+        if self._option_index is not None:
+            self._option_index.append(value)
+        self._options_changed()
+
+    def remove_option(self, value):
+        index = self.options.index(value)
+        del self.options[index]
+        if self._option_index is not None:
+            self._option_index.remove(index, value)
+        self._options_changed()
+
+        if index < self.selected_index:
+            self.selected_index -= 1
+        elif index == self.selected_index:
+            if self.options:
+                self.set_index(min(index, len(self.options) - 1))
+            else:
+                self.selected_value = ""
+                self._update_text()
+
+    def _options_changed(self):
+        self._mark_list_dirty()
+        if len(self.option_components) != min(len(self.options), self.max_visible_options):
+            self._build_rows()
+        if self.filter_text:
+            self._filter_range = self._get_option_index().prefix_range(self.filter_text)
+        self.scroll_to(self.scroll_offset)
+        self._refresh_rows()
+
+    # -------------------------
+    # OPTION VIEW (filtered or all options)
+    # -------------------------
+    def _get_option_index(self):
+        # built on first use, later option changes update it incrementally
+        if self._option_index is None:
+            self._option_index = OptionIndex(self.options)
+        return self._option_index
 
+    def _view_len(self):
+        if self._filter_range is None:
+            return len(self.options)
+        return self._filter_range[1] - self._filter_range[0]
+
+    def _view_option(self, position):
+        if self._filter_range is None:
+            return position
+        return self._option_index.index_at(self._filter_range[0] + position)
+
+    def _view_position(self, index):
+        # position of an option in the current view, None if it is filtered out
+        if self._filter_range is None:
+            return index
+        lo, hi = self._filter_range
+        position = self._option_index.position_of(index, self.options[index])
+        return position - lo if lo <= position < hi else None
+
+    def _refresh_rows(self):
+        view_len = self._view_len()
+        for i, opt in enumerate(self.option_components):
+            position = self.scroll_offset + i
+            visible = self.is_open and position < view_len
+            if visible:
+                index = self._view_option(position)
+                if opt.index != index or opt.value != self.options[index]:
+                    opt.set_option(index, self.options[index])
+                    opt.mark_dirty()
+            # the visible setter redraws the row's area
+            opt.visible = visible
+
+    def _list_rect(self):
+        x, y, w, h = self.absolute_rect
+        return (x, y + h, w, h * len(self.option_components))
+
+    def _mark_list_dirty(self):
+        if self.ui_manager is not None and self.is_open:
+            self.ui_manager.add_dirty_rect(self._list_rect())
+
+    def scroll_to(self, offset):
+        max_offset = max(0, self._view_len() - len(self.option_components))
+        offset = max(0, min(offset, max_offset))
+        if offset == self.scroll_offset:
+            return
+        self.scroll_offset = offset
+        self._refresh_rows()
+        # scrollbar
+        self._mark_list_dirty()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.scroll_offset + rows)
+
+    def _scroll_to_selected(self):
+        position = self._view_position(self.selected_index) if self.options else None
+        if position is None:
+            self.scroll_to(0)
+        elif position < self.scroll_offset:
+            self.scroll_to(position)
+        elif position >= self.scroll_offset + len(self.option_components):
+            self.scroll_to(position - len(self.option_components) + 1)
+
+    # -------------------------
+    # KEYBOARD
+    # -------------------------
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEWHEEL and self.is_open:
+            self.scroll_by(-event.y)
+        elif event.type == pygame.KEYDOWN and self.enabled and self.options:
+            self._handle_key(event)
+
+    def _handle_key(self, event):
+        if event.key in (pygame.K_UP, pygame.K_DOWN):
+            self._move_selection(-1 if event.key == pygame.K_UP else 1)
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            self.toggle()
+        elif event.key == pygame.K_ESCAPE:
+            if self.is_open:
+                self.close()
+        elif event.key == pygame.K_BACKSPACE:
+            if self.filterable and self.filter_text:
+                self.set_filter(self.filter_text[:-1])
+        elif event.unicode and event.unicode.isprintable():
+            if self.filterable and self.is_open:
+                self.set_filter(self.filter_text + event.unicode)
+            else:
+                self._type_ahead(event.unicode)
+
+    def _move_selection(self, step):
+        view_len = self._view_len()
+        if view_len == 0:
+            return
+        position = self._view_position(self.selected_index)
+        position = 0 if position is None else max(0, min(position + step, view_len - 1))
+        self.set_index(self._view_option(position))
+        self._scroll_to_selected()
+
+    def _type_ahead(self, char):
+        # keys typed within TYPEAHEAD_TIMEOUT extend the prefix,
+        # repeating one letter cycles through the options starting with it
+        now = time.time()
+        if now - self._typeahead_at > TYPEAHEAD_TIMEOUT:
+            self._typeahead = ""
+        self._typeahead_at = now
+        self._typeahead += char
+
+        buffer = self._typeahead
+        cycle = len(buffer) > 1 and buffer.count(buffer[0]) == len(buffer)
+        index = self._get_option_index().find(
+            buffer[0] if cycle else buffer,
+            self.selected_index, self.options[self.selected_index],
+            cycle=cycle or len(buffer) == 1,
+        )
+        if index is not None and index != self.selected_index:
+            self.set_index(index)
+            if self.is_open:
+                self._scroll_to_selected()
+
+    def set_filter(self, text):
+        # only options starting with text (case-insensitive) are listed, alphabetically
+        self.filter_text = text
+        self._filter_range = self._get_option_index().prefix_range(text) if text else None
+        self.scroll_offset = 0
+        self._update_text()
+        self._mark_list_dirty()
+        self._refresh_rows()
+
+    # -------------------------
+    # OPEN / CLOSE
+    # -------------------------
     def open(self):
         if self.is_open:
             return
 
         self.is_open = True
-        for opt in self.option_components:
-            opt.visible = True
+        self.mark_dirty()
+        self._scroll_to_selected()
+        self._refresh_rows()
     
         self.ui_manager.modal = self
 
@@ -106,19 +416,42 @@ class Select(UIComponent):
         #     self.children.remove(opt)
         #self.option_components.clear()
         self.ui_manager.modal = None
-        for opt in self.option_components:
-            opt.visible = False
+        self.mark_dirty()
+        self._refresh_rows()
+        if self.filter_text:
+            self.set_filter("")
 
 
     def set_value(self, value):
+        if value in self.options:
+            self.set_index(self.options.index(value))
+            return
         self.selected_value = value
-        self.text.set_text(value)
+        self._update_text()
         if self.on_option_change:
-            self.on_option_change()
+            run_callback(self.on_option_change)
+
+    def set_index(self, index):
+        self.selected_index = index
+        self.selected_value = self.options[index]
+        self._update_text()
+        if self.on_option_change:
+            run_callback(self.on_option_change)
+
+    def _update_text(self):
+        # while filtering the box shows the typed filter instead of the value
+        self.text.set_text(self.filter_text or self.selected_value)
 
     def on_click(self, event):
         if self.enabled:
             self.toggle()
+
+    def visual_state(self):
+        return super().visual_state() + (self.is_open,)
+
+    def can_use_surface_cache(self):
+        # the open list is drawn outside the select rect
+        return not self.is_open
     
     def draw(self, surface: pygame.Surface):
         if self.visible == False:
@@ -143,4 +476,18 @@ class Select(UIComponent):
                 (cx, cy + 3),
             ]
 
-        pygame.draw.polygon(surface, (0, 0, 0), points)
+        Draw.polygon(surface, (0, 0, 0), points)
+
+        if self.is_open and self._view_len() > len(self.option_components):
+            self._draw_scrollbar(surface)
+
+    def _draw_scrollbar(self, surface: pygame.Surface):
+        x, y, w, h = self._list_rect()
+        track = pygame.Rect(x + w - SCROLLBAR_WIDTH - 2, y + 2, SCROLLBAR_WIDTH, h - 4)
+        Draw.rect(surface, (200, 200, 200), track, 0)
+
+        view_len = self._view_len()
+        thumb_height = max(SCROLLBAR_WIDTH, track.height * len(self.option_components) // view_len)
+        max_offset = view_len - len(self.option_components)
+        thumb_y = track.y + (track.height - thumb_height) * self.scroll_offset // max_offset
+        Draw.rect(surface, (120, 120, 120), (track.x, thumb_y, SCROLLBAR_WIDTH, thumb_height), 0)
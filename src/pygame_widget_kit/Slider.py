@@ -1,9 +1,17 @@
 import pygame
 from .UIComponent import *
+from .Palette import intern_color, lighten_color, darken_color, dim_color
 from functools import partial
+from . import Draw
 
 
 class Slider(UIComponent):
+    __slots__ = (
+        "min_value", "max_value", "value", "size", "handle_color", "handle_hover_color",
+        "handle_active_color", "handle_border_color", "dragging", "drag_offset",
+        "change_function", "handle_width", "handle_height",
+    )
+
     def __init__(
         self,
         pos=(0, 0),
@@ -26,14 +34,14 @@ class Slider(UIComponent):
 
         self.size = size
 
-        self.handle_color = handle_color
+        self.handle_color = intern_color(handle_color)
         self.handle_hover_color = (
-            handle_hover_color
+            intern_color(handle_hover_color)
             if handle_hover_color is not None
-            else tuple(min(c + 30, 255) for c in handle_color)
+            else lighten_color(handle_color, 30)
         )
-        self.handle_active_color = tuple(max(c - 40, 0) for c in handle_color)
-        self.handle_border_color = handle_border_color
+        self.handle_active_color = darken_color(handle_color, 40)
+        self.handle_border_color = intern_color(handle_border_color)
 
         self.dragging = False
         self.drag_offset = 0
@@ -52,12 +60,13 @@ class Slider(UIComponent):
 
     def on_change(self):
         if self.change_function is not None:
-            self.change_function()
+            run_callback(self.change_function)
 
     def set_value(self, value):
         if self.max_value == self.min_value:
             if self.value != self.min_value:
                 self.value = self.min_value
+                self.mark_dirty()
                 self.on_change()
             return
 
@@ -69,6 +78,7 @@ class Slider(UIComponent):
 
         self.value = value
         if self.value != old_value:
+            self.mark_dirty()
             self.on_change()
 
     def get_value(self):
@@ -112,8 +122,17 @@ class Slider(UIComponent):
         ratio = (center_x - min_center) / (max_center - min_center)
         self.set_value(self.min_value + ratio * (self.max_value - self.min_value))
 
-    def _begin_drag(self):
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+    def handle_event(self, event):
+        # UIManager forwards mouse motion to the pressed (active) component
+        if not self.visible or not self.enabled:
+            return
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self._begin_drag(event.pos)
+        elif event.type == pygame.MOUSEMOTION and self.dragging and self.active:
+            self._set_value_from_mouse(event.pos[0], use_offset=True)
+
+    def _begin_drag(self, pos):
+        mouse_x, mouse_y = pos
         handle_rect = self._get_handle_rect()
 
         if handle_rect.collidepoint(mouse_x, mouse_y):
@@ -135,16 +154,15 @@ class Slider(UIComponent):
         self.drag_offset = 0
         
 
+    def visual_state(self):
+        return super().visual_state() + (self.value,)
+
     def draw(self, surface: pygame.Surface):
         if not self.visible:
             return
 
-        if self.active and self.enabled:
-            if not self.dragging:
-                self._begin_drag()
-            mouse_x, _ = pygame.mouse.get_pos()
-            self._set_value_from_mouse(mouse_x, use_offset=True)
-        else:
+        if not (self.active and self.enabled):
+            # released outside the slider (no on_click)
             self.dragging = False
             self.drag_offset = 0
 
@@ -152,13 +170,13 @@ class Slider(UIComponent):
 
         handle_color = self.handle_color
         if not self.enabled:
-            handle_color = tuple(c // 2 for c in handle_color)
+            handle_color = dim_color(handle_color)
         elif self.active:
             handle_color = self.handle_active_color
         elif self.hovered:
             handle_color = self.handle_hover_color
 
         handle_rect = self._get_handle_rect()
-        pygame.draw.rect(surface, handle_color, handle_rect, 0)
+        Draw.rect(surface, handle_color, handle_rect, 0)
         if self.handle_border_color:
-            pygame.draw.rect(surface, self.handle_border_color, handle_rect, 2)
+            Draw.rect(surface, self.handle_border_color, handle_rect, 2)
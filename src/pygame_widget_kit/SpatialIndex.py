@@ -0,0 +1,131 @@
+import itertools
+from .Widget import Widget
+
+
+DEFAULT_CELL_SIZE = 64
+
+
+class SpatialGrid:
+    # Uniform grid over absolute_rect used by UIManager.hit_test.
+    # Every indexed component gets an order key that mirrors the draw order
+    # (parent before children, children by z_index then insertion), so the
+    # hit is simply the highest key whose rect contains the point.
+    def __init__(self, root, cell_size=DEFAULT_CELL_SIZE):
+        self.root = root
+        self.cell_size = cell_size
+
+        self._cells = {}      # (cx, cy) -> list[component]
+        self._entries = {}    # component -> [cells, order_key]
+        self._seq = itertools.count()
+        self._sibling_seq = {}
+
+        self.insert(root)
+
+    def _cells_for(self, rect):
+        x, y, w, h = rect
+        size = self.cell_size
+        x0, y0 = int(x // size), int(y // size)
+        x1, y1 = int((x + w) // size), int((y + h) // size)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def _add_to_cells(self, component, cells):
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(component)
+
+    def _remove_from_cells(self, component, cells):
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                continue
+            bucket.remove(component)
+            if not bucket:
+                del self._cells[cell]
+
+    def _is_container(self, component):
+        # hit_test only descends into the root and Widget instances
+        return component is self.root or isinstance(component, Widget)
+
+    def _order_key(self, component):
+        if component is self.root:
+            return ()
+        parent_entry = self._entries[component.parent]
+        seq = self._sibling_seq.get(component)
+        if seq is None:
+            seq = self._sibling_seq[component] = next(self._seq)
+        return parent_entry[1] + ((component.z_index, seq),)
+
+    def insert(self, component):
+        if component is not self.root:
+            parent = component.parent
+            if parent not in self._entries or not self._is_container(parent):
+                return
+        if component in self._entries:
+            self.remove(component)
+
+        cells = self._cells_for(component.absolute_rect)
+        self._entries[component] = [cells, self._order_key(component)]
+        self._add_to_cells(component, cells)
+
+        if self._is_container(component):
+            for child in component.children:
+                self.insert(child)
+
+    def remove(self, component):
+        entry = self._entries.pop(component, None)
+        if entry is None:
+            return
+        self._remove_from_cells(component, entry[0])
+        self._sibling_seq.pop(component, None)
+        for child in component.children:
+            self.remove(child)
+
+    def move(self, component):
+        # called for a single node after its absolute_rect changed
+        entry = self._entries.get(component)
+        if entry is None:
+            return
+        cells = self._cells_for(component.absolute_rect)
+        if cells == entry[0]:
+            return
+        self._remove_from_cells(component, entry[0])
+        self._add_to_cells(component, cells)
+        entry[0] = cells
+
+    def move_subtree(self, component):
+        # a moved node shifts its whole subtree; only containers have indexed children
+        self.move(component)
+        if self._is_container(component):
+            for child in component.children:
+                self.move_subtree(child)
+
+    def _is_hittable(self, component):
+        if not component.visible:
+            return False
+        if self._is_container(component) and not component.enabled:
+            return False
+
+        node = component.parent
+        while node is not None:
+            if not node.visible or not node.enabled:
+                return False
+            if node is self.root:
+                break
+            node = node.parent
+        return True
+
+    def query(self, pos):
+        size = self.cell_size
+        bucket = self._cells.get((int(pos[0] // size), int(pos[1] // size)))
+        if not bucket:
+            return None
+
+        best = None
+        best_key = None
+        for component in bucket:
+            key = self._entries[component][1]
+            if best_key is not None and key < best_key:
+                continue
+            if component.is_in_rect(pos) and self._is_hittable(component):
+                best = component
+                best_key = key
+        return best
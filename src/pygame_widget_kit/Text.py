@@ -1,7 +1,11 @@
 import pygame
 from .UIComponent import *
+from .FontCache import get_font
+from .TextRenderer import render_text
 
 class Text(UIComponent):
+    __slots__ = ("font_size", "font_type", "font", "text_str", "text_color", "render", "size")
+
     def __init__(self, text_str="",font_size=25,
                  font_type='Veranda',pos=(0,0),
                  text_color:tuple[int,int,int] = (127,127,127),
@@ -14,31 +18,45 @@ class Text(UIComponent):
         
         self.font_size=font_size
         self.font_type=font_type
-        self.font = pygame.font.SysFont(self.font_type, self.font_size)
+        self.font = get_font(self.font_type, self.font_size)
         self.text_str = text_str
         self.text_color = text_color
-        self.render = self.font.render(text_str, True,self.text_color , None)        
+        self.render = render_text(self.font, text_str, True,self.text_color , None)        
         self.size = self.render.get_size()
         rect = (pos[0],pos[1],self.size[0],self.size[1])
         
         super().__init__(rect, style, z_index, color, border_color)
         
     def set_text(self,new_text_str):
+        if new_text_str == self.text_str:
+            return
         self.text_str = new_text_str
-        self.render = self.font.render(self.text_str, True,self.text_color , None)        
-        self.size = self.render.get_size()
+        self.render = render_text(self.font, self.text_str, True,self.text_color , None)        
+        self._update_size()
 
+    def _update_size(self):
+        # old and new text areas both have to be redrawn
+        self.mark_dirty()
+        self.invalidate_surface_cache()
+        old_size = self.size
+        self.size = self.render.get_size()
+        if self.size != old_size:
+            # the position is unchanged, only this rect (and its index cells) changed
+            self.rect = (self.rect[0],self.rect[1],self.size[0],self.size[1])
+            self.update_absolute_rect()
+            self.mark_dirty()
+            self.invalidate_layout()
     
     def update_font_size(self,new_size):
         self.font_size = new_size
-        self.font = pygame.font.SysFont(self.font_type, self.font_size)
-        self.render = self.font.render(self.text_str, True,(255,255,255) , None)        
-        self.size = self.render.get_size()
+        self.font = get_font(self.font_type, self.font_size)
+        self.render = render_text(self.font, self.text_str, True,(255,255,255) , None)        
+        self._update_size()
     def update_font_type(self,new_type):
         self.font_type = new_type
-        self.font = pygame.font.SysFont(self.font_type, self.font_size)
-        self.render = self.font.render(self.text_str, True,(255,255,255) , None)        
-        self.size = self.render.get_size()
+        self.font = get_font(self.font_type, self.font_size)
+        self.render = render_text(self.font, self.text_str, True,(255,255,255) , None)        
+        self._update_size()
     
 
     def draw(self, surface):
@@ -1,8 +1,29 @@
 import pygame
 from .UIComponent import *
+from .FontCache import get_font
+from .TextRenderer import LineRenderCache
+from .Palette import dim_color
+from .TextInput import PrefixWidths
+from queue import SimpleQueue, Empty
+
+
+# measured word widths kept per TextArea for word_wrap
+WORD_WIDTH_CACHE_SIZE = 4096
+
+
+def _byte_len(paragraph):
+    # utf-8 size of a stored line including its newline
+    return len(paragraph.encode("utf-8")) + 1
 
 
 class TextArea(UIComponent):
+    __slots__ = (
+        "_text_str", "font_size", "font_type", "font", "text_color", "padding",
+        "line_spacing", "max_chars_per_line", "line_height", "_lines", "scroll_offset",
+        "_line_cache", "word_wrap", "_word_widths", "_wrapped_width", "_paragraphs", "_line_counts",
+        "_head", "_line_head", "_lines_view", "max_lines", "max_bytes", "_text_bytes", "_posted",
+    )
+
     def __init__(
         self,
         rect,
@@ -18,22 +39,42 @@ class TextArea(UIComponent):
         style=None,
         z_index=0,
         border_color=None,
+        word_wrap=False,
+        max_lines=None,
+        max_bytes=None,
     ):
         self.font_size = font_size
         self.font_type = font_type
-        self.font = pygame.font.SysFont(self.font_type, self.font_size)
+        self.font = get_font(self.font_type, self.font_size)
+        self._line_cache = LineRenderCache(self.font)
 
         self.text_str = text_str
         self.text_color = text_color
         self.padding = padding
         self.line_spacing = line_spacing
         self.max_chars_per_line = max_chars_per_line
+        # word_wrap: wrap at the pixel width of rect instead of max_chars_per_line
+        self.word_wrap = word_wrap
+        self._word_widths = {}
+
+        # log view: oldest lines are dropped above max_lines lines / max_bytes utf-8 bytes
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self._text_bytes = 0
+        # post_text/post_lines from other threads, drained by the UI thread in poll()
+        self._posted = SimpleQueue()
+
+        # first visible line, only the lines inside the rect are rendered
+        self.scroll_offset = 0
+        self._lines_view = WrappedLinesView(self)
 
         super().__init__(rect, style, z_index, bg_color, border_color, hover_color)
 
         self._rebuild_lines()
 
     def _wrap_line(self, line):
+        if self.word_wrap:
+            return self._wrap_pixels(line)
         if self.max_chars_per_line is None or self.max_chars_per_line <= 0:
             return [line]
 
@@ -68,53 +109,331 @@ class TextArea(UIComponent):
 
         return wrapped
 
-    def _rebuild_lines(self):
-        raw_lines = self.text_str.split("\n")
-        self.lines = []
-        for raw_line in raw_lines:
-            if raw_line == "":
-                self.lines.append("")
+    # -------------------------
+    # PIXEL WRAP
+    # -------------------------
+    def _wrap_width(self):
+        return max(1, self.rect[2] - 2 * self.padding)
+
+    def _word_width(self, word):
+        width = self._word_widths.get(word)
+        if width is None:
+            if len(self._word_widths) >= WORD_WIDTH_CACHE_SIZE:
+                self._word_widths.clear()
+            width = self._word_widths[word] = self.font.size(word)[0]
+        return width
+
+    def _wrap_pixels(self, line):
+        # line width = word widths + spaces, kerning across a space is ignored
+        max_width = self._wrap_width()
+        space = self._word_width(" ")
+
+        wrapped = []
+        current = []
+        current_width = 0
+
+        for word in line.split(" "):
+            width = self._word_width(word)
+            if current and current_width + space + width <= max_width:
+                current.append(word)
+                current_width += space + width
                 continue
-            self.lines.extend(self._wrap_line(raw_line))
+
+            if current:
+                wrapped.append(" ".join(current))
+            if width > max_width:
+                # longer than a whole line: break it between characters
+                pieces = self._break_word(word, max_width)
+                wrapped.extend(pieces[:-1])
+                word = pieces[-1]
+                width = self._word_width(word)
+            current = [word]
+            current_width = width
+
+        wrapped.append(" ".join(current))
+        return wrapped
+
+    def _break_word(self, word, max_width):
+        pieces = []
+        while word:
+            prefix_widths = PrefixWidths(self.font, word)
+            cut = max(1, prefix_widths.index_at(max_width) - 1)
+            pieces.append(word[:cut])
+            word = word[cut:]
+        return pieces
+
+    # -------------------------
+    # PARAGRAPHS
+    # -------------------------
+    def _rebuild_lines(self):
         self.line_height = self.font.get_linesize()
-        self.line_renders = [
-            self.font.render(line, True, self.text_color, None) for line in self.lines
-        ]
+        self._line_cache.set_font(self.font)
+        self._word_widths.clear()
+        self._wrapped_width = self._wrap_width()
+
+        # read first, text_str may be joined from the store that is reset below
+        text = self.text_str
+        # entries before _head/_line_head were dropped by _trim and are released in batches
+        self._paragraphs = []
+        self._line_counts = []
+        self._head = 0
+        self._line_head = 0
+        self._text_bytes = 0
+        self._lines = []
+        self._splice_paragraphs(0, 0, text.split("\n"))
+
+    @property
+    def lines(self):
+        # read-only view of the wrapped lines that are kept
+        return self._lines_view
+
+    def _line_count(self):
+        return len(self._lines) - self._line_head
+
+    def _paragraph_count(self):
+        return len(self._paragraphs) - self._head
+
+    def _splice_paragraphs(self, start, end, paragraphs):
+        # replaces paragraphs[start:end], only the new paragraphs are wrapped
+        counts = self._line_counts
+        head = self._head
+        start += head
+        end += head
+        if start - head <= len(counts) - end:
+            first_line = self._line_head + sum(counts[head:start])
+        else:
+            first_line = len(self._lines) - sum(counts[start:])
+        old_line_count = sum(counts[start:end])
+
+        wrapped = [self._wrap_line(paragraph) if paragraph else [""] for paragraph in paragraphs]
+        self._lines[first_line:first_line + old_line_count] = [line for lines in wrapped for line in lines]
+        counts[start:end] = [len(lines) for lines in wrapped]
+        self._text_bytes += sum(map(_byte_len, paragraphs)) - sum(map(_byte_len, self._paragraphs[start:end]))
+        self._paragraphs[start:end] = paragraphs
+        self._trim()
+
+        self.scroll_to(self.scroll_offset)
+        self.mark_dirty()
+        self.invalidate_surface_cache()
+
+    def _trim(self):
+        paragraphs = self._paragraphs
+        head = self._head
+        count = len(paragraphs) - head
+        drop = max(0, count - self.max_lines) if self.max_lines is not None else 0
+        freed = sum(map(_byte_len, paragraphs[head:head + drop]))
+        if self.max_bytes is not None:
+            # the last line is always kept
+            while drop < count - 1 and self._text_bytes - freed > self.max_bytes:
+                freed += _byte_len(paragraphs[head + drop])
+                drop += 1
+        if not drop:
+            return
+
+        dropped_lines = sum(self._line_counts[head:head + drop])
+        self._head += drop
+        self._line_head += dropped_lines
+        self._text_bytes -= freed
+        self._text_str = None
+        # the same lines stay on screen
+        self.scroll_offset = max(0, self.scroll_offset - dropped_lines)
+
+        if self._head > len(paragraphs) - self._head:
+            # release the dropped entries once they outnumber the kept ones,
+            # amortized O(1) per dropped line instead of a shift per append
+            del paragraphs[:self._head]
+            del self._line_counts[:self._head]
+            del self._lines[:self._line_head]
+            self._head = 0
+            self._line_head = 0
+
+    def _append(self, text):
+        # the last paragraph and the new ones
+        count = self._paragraph_count()
+        new_paragraphs = (self._paragraphs[-1] + text).split("\n")
+        if self.max_lines is not None and len(new_paragraphs) > self.max_lines:
+            # everything before would be dropped, only the newest lines are wrapped
+            self._splice_paragraphs(0, count, new_paragraphs[-self.max_lines:])
+        else:
+            self._splice_paragraphs(count - 1, count, new_paragraphs)
+
+    def _text_changed(self, old_text):
+        new_text = self.text_str
+        paragraphs = self._paragraphs[self._head:]
+        if new_text.startswith(old_text):
+            self._append(new_text[len(old_text):])
+            return
+
+        new_paragraphs = new_text.split("\n")
+        limit = min(len(paragraphs), len(new_paragraphs))
+        start = 0
+        while start < limit and paragraphs[start] == new_paragraphs[start]:
+            start += 1
+        end = 0
+        while end < limit - start and paragraphs[-1 - end] == new_paragraphs[-1 - end]:
+            end += 1
+        self._splice_paragraphs(start, len(paragraphs) - end, new_paragraphs[start:len(new_paragraphs) - end])
+
+    def _visible_line_count(self):
+        step = self.line_height + self.line_spacing
+        return max(1, int((self.rect[3] - 2 * self.padding) // step))
+
+    def scroll_to(self, line):
+        line = max(0, min(line, self._line_count() - self._visible_line_count()))
+        if line != self.scroll_offset:
+            self.scroll_offset = line
+            self.mark_dirty()
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEWHEEL:
+            self.scroll_to(self.scroll_offset - event.y)
+
+    @property
+    def text_str(self):
+        # joined on demand, appends only touch the line store
+        if self._text_str is None:
+            self._text_str = "\n".join(self._paragraphs[self._head:])
+        return self._text_str
+
+    @text_str.setter
+    def text_str(self, value):
+        self._text_str = value
 
     def set_text(self, new_text_str):
+        # only the paragraphs that differ from the current text are re-wrapped
+        old_text = self.text_str
         self.text_str = new_text_str
-        self._rebuild_lines()
+        self._text_changed(old_text)
+
+    # -------------------------
+    # STREAMING
+    # -------------------------
+    def append_text(self, text):
+        if not text:
+            return
+        # a view scrolled to the end keeps following new lines
+        following = self.scroll_offset >= self._line_count() - self._visible_line_count()
+        self._text_str = None
+        self._append(text)
+        if following:
+            self.scroll_to(self._line_count())
+
+    def append_lines(self, lines):
+        lines = list(lines)
+        if not lines:
+            return
+        text = "\n".join(lines)
+        self.append_text(text if self._is_empty() else "\n" + text)
+
+    def _is_empty(self):
+        return self._paragraph_count() == 1 and self._paragraphs[-1] == ""
+
+    def post_text(self, text):
+        # thread-safe, applied at the start of the next UIManager.update()
+        self._posted.put(("text", text))
+        self._request_poll()
+
+    def post_lines(self, lines):
+        self._posted.put(("lines", list(lines)))
+        self._request_poll()
+
+    def _request_poll(self):
+        # coalesced: one poll() per frame however many posts arrive; text
+        # posted before the area is attached is drained by its first draw
+        ui_manager = self.ui_manager
+        if ui_manager is not None:
+            ui_manager.post_update(self, "poll")
+
+    def poll(self):
+        # everything posted since the last frame in one append
+        parts = []
+        while True:
+            try:
+                kind, value = self._posted.get_nowait()
+            except Empty:
+                break
+            if kind == "text":
+                parts.append(value)
+            elif value:
+                # same as append_lines: each line starts a new line
+                if parts or not self._is_empty():
+                    parts.append("\n")
+                parts.append("\n".join(value))
+        if parts:
+            self.append_text("".join(parts))
 
     def update_font_size(self, new_size):
         self.font_size = new_size
-        self.font = pygame.font.SysFont(self.font_type, self.font_size)
+        self.font = get_font(self.font_type, self.font_size)
         self._rebuild_lines()
 
     def update_font_type(self, new_type):
         self.font_type = new_type
-        self.font = pygame.font.SysFont(self.font_type, self.font_size)
+        self.font = get_font(self.font_type, self.font_size)
         self._rebuild_lines()
 
+    def visual_state(self):
+        return super().visual_state() + (self.scroll_offset,)
+
     def draw(self, surface):
         if not self.visible:
             return
 
+        if self.word_wrap and self._wrapped_width != self._wrap_width():
+            # resized (e.g. by a layout)
+            self._rebuild_lines()
+        if not self._posted.empty():
+            self.poll()
+
         super().draw(surface)
 
-        if not self.lines:
+        if not self._line_count():
             return
 
         color = self.text_color
         if not self.enabled:
-            color = tuple(c // 2 for c in color)
+            color = dim_color(color)
 
         x = self.absolute_rect[0] + self.padding
         y = self.absolute_rect[1] + self.padding
         step = self.line_height + self.line_spacing
 
-        for i, line in enumerate(self.lines):
-            if color == self.text_color:
-                render = self.line_renders[i]
-            else:
-                render = self.font.render(line, True, color, None)
-            surface.blit(render, (x, y + i * step))
+        old_clip = surface.get_clip()
+        surface.set_clip(old_clip.clip(self.absolute_rect))
+
+        # only the lines inside the rect (+1 partially visible line)
+        first = self.scroll_offset
+        last = min(self._line_count(), first + self._visible_line_count() + 1)
+        lines = self._lines
+        head = self._line_head
+        for i in range(first, last):
+            render = self._line_cache.get(lines[head + i], color)
+            surface.blit(render, (x, y + (i - first) * step))
+
+        surface.set_clip(old_clip)
+
+
+class WrappedLinesView:
+    # read-only list-like access to the wrapped lines of a TextArea, without
+    # copying the store that still holds the dropped lines in front
+    def __init__(self, area: TextArea):
+        self.area = area
+
+    def __len__(self):
+        return self.area._line_count()
+
+    def __getitem__(self, index):
+        area = self.area
+        count = area._line_count()
+        if isinstance(index, slice):
+            return [area._lines[area._line_head + i] for i in range(*index.indices(count))]
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("line index out of range")
+        return area._lines[area._line_head + index]
+
+    def __iter__(self):
+        area = self.area
+        for i in range(area._line_head, len(area._lines)):
+            yield area._lines[i]
@@ -0,0 +1,224 @@
+CHUNK_SIZE = 1024
+
+
+class _FenwickTree:
+    # prefix sums over chunk lengths / newline counts with O(log n) updates
+    def __init__(self, values=()):
+        self.size = len(values)
+        self.tree = [0] * (self.size + 1)
+        for i, value in enumerate(values, 1):
+            self.tree[i] += value
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, index, delta):
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, count):
+        # sum of the first `count` values
+        total = 0
+        i = count
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def search(self, value):
+        # smallest index whose inclusive prefix sum is greater than value
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= value:
+                pos = nxt
+                value -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+
+class TextBuffer:
+    # Chunked rope: the text is kept as a list of short strings with Fenwick
+    # trees over their lengths and newline counts. Insert and delete only
+    # rebuild the chunks they touch, offset and line lookups are O(log n).
+    # Emptied chunks stay in the list (as zeros in the trees), so the trees are
+    # only rebuilt when a chunk splits or the empty chunks are compacted.
+    def __init__(self, text=""):
+        self._lines_view = LinesView(self)
+        self.set_text(text)
+
+    def set_text(self, text):
+        self._chunks = [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)] or [""]
+        self._length = len(text)
+        self._text = text
+        self._empty_chunks = self._chunks.count("")
+        self._rebuild_trees()
+
+    def _rebuild_trees(self):
+        self._lengths = _FenwickTree([len(c) for c in self._chunks])
+        self._newlines = _FenwickTree([c.count("\n") for c in self._chunks])
+
+    def get_text(self):
+        # the joined string is cached until the next edit
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return self.get_text()
+
+    def _locate(self, offset):
+        # (chunk index, offset inside chunk) for 0 <= offset <= len
+        if offset >= self._length:
+            last = len(self._chunks) - 1
+            return last, len(self._chunks[last])
+        index = self._lengths.search(offset)
+        return index, offset - self._lengths.prefix(index)
+
+    def _replace_chunk(self, index, new_chunk):
+        old_chunk = self._chunks[index]
+        self._empty_chunks += (not new_chunk) - (not old_chunk)
+        if len(new_chunk) > 2 * CHUNK_SIZE:
+            # the pieces need CHUNK_SIZE more characters before they split again,
+            # so the O(chunks) rebuild is amortized over the inserted text
+            parts = [new_chunk[i:i + CHUNK_SIZE] for i in range(0, len(new_chunk), CHUNK_SIZE)]
+            self._chunks[index:index + 1] = parts
+            self._rebuild_trees()
+            return
+
+        self._chunks[index] = new_chunk
+        self._lengths.add(index, len(new_chunk) - len(old_chunk))
+        self._newlines.add(index, new_chunk.count("\n") - old_chunk.count("\n"))
+
+    def _compact_empty_chunks(self):
+        # drop the empty chunks once they are half of the list, amortized O(1) per edit
+        if self._empty_chunks * 2 > len(self._chunks) > 1:
+            self._chunks = [chunk for chunk in self._chunks if chunk] or [""]
+            self._empty_chunks = self._chunks.count("")
+            self._rebuild_trees()
+
+    def insert(self, offset, text):
+        if not text:
+            return
+        offset = max(0, min(offset, self._length))
+        index, local = self._locate(offset)
+        chunk = self._chunks[index]
+        self._replace_chunk(index, chunk[:local] + text + chunk[local:])
+        self._length += len(text)
+        self._text = None
+
+    def delete(self, start, end):
+        start = max(0, start)
+        end = min(end, self._length)
+        remaining = end - start
+        if remaining <= 0:
+            return
+
+        index, local = self._locate(start)
+        self._length -= remaining
+        self._text = None
+        while remaining > 0:
+            chunk = self._chunks[index]
+            if local >= len(chunk):
+                index += 1
+                local = 0
+                continue
+            removed = min(remaining, len(chunk) - local)
+            self._replace_chunk(index, chunk[:local] + chunk[local + removed:])
+            remaining -= removed
+        self._compact_empty_chunks()
+
+    def slice(self, start, end):
+        start = max(0, start)
+        end = min(end, self._length)
+        if start >= end:
+            return ""
+        if self._text is not None:
+            return self._text[start:end]
+
+        index, local = self._locate(start)
+        parts = []
+        remaining = end - start
+        while remaining > 0:
+            part = self._chunks[index][local:local + remaining]
+            parts.append(part)
+            remaining -= len(part)
+            index += 1
+            local = 0
+        return "".join(parts)
+
+    # -------------------------
+    # LINES
+    # -------------------------
+    def line_count(self):
+        return self._newlines.prefix(len(self._chunks)) + 1
+
+    def line_start(self, line):
+        if line <= 0:
+            return 0
+        # chunk that holds the line-th newline
+        index = self._newlines.search(line - 1)
+        if index >= len(self._chunks):
+            return self._length
+        before = self._newlines.prefix(index)
+        chunk = self._chunks[index]
+        pos = -1
+        for _ in range(line - before):
+            pos = chunk.index("\n", pos + 1)
+        return self._lengths.prefix(index) + pos + 1
+
+    def line(self, line):
+        start = self.line_start(line)
+        if line + 1 < self.line_count():
+            end = self.line_start(line + 1) - 1
+        else:
+            end = self._length
+        return self.slice(start, end)
+
+    def line_length(self, line):
+        start = self.line_start(line)
+        if line + 1 < self.line_count():
+            return self.line_start(line + 1) - 1 - start
+        return self._length - start
+
+    def offset_to_line_col(self, offset):
+        offset = max(0, min(offset, self._length))
+        index, local = self._locate(offset)
+        line = self._newlines.prefix(index) + self._chunks[index].count("\n", 0, local)
+        return line, offset - self.line_start(line)
+
+    def line_col_to_offset(self, line, col):
+        return self.line_start(line) + col
+
+    @property
+    def lines(self):
+        return self._lines_view
+
+
+class LinesView:
+    # read-only list-like access to the lines of a TextBuffer
+    def __init__(self, buffer: TextBuffer):
+        self.buffer = buffer
+
+    def __len__(self):
+        return self.buffer.line_count()
+
+    def __getitem__(self, index):
+        count = self.buffer.line_count()
+        if isinstance(index, slice):
+            return [self.buffer.line(i) for i in range(*index.indices(count))]
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("line index out of range")
+        return self.buffer.line(index)
+
+    def __iter__(self):
+        for i in range(self.buffer.line_count()):
+            yield self.buffer.line(i)
@@ -1,7 +1,11 @@
 import pygame
 from .UIComponent import UIComponent
 from .Text import Text
+from .FontCache import get_font
+from .TextRenderer import LineRenderCache
+from .TextBuffer import TextBuffer
 import time
+from . import Draw
 
 """ 
 class TextInput2(UIComponent):
@@ -106,7 +110,7 @@ class TextInput2(UIComponent):
                 text_h
             )
 
-            pygame.draw.rect(surface, self.caret_color, caret_rect)
+            Draw.rect(surface, self.caret_color, caret_rect)
     def get_value(self):
         return self.text_value
 
@@ -129,7 +133,60 @@ OCTAL_ONLY = 5
 
 
 
+class PrefixWidths:
+    # Memoized pixel widths of text[:i] for caret, selection and mouse mapping.
+    # Widths are measured on demand with font.size (so kerning matches the
+    # rendered text) and an edit at index i only drops the entries after i.
+    # text is a str or a TextBuffer, which is sliced instead of joined.
+    def __init__(self, font: pygame.font.Font, text=""):
+        self.font = font
+        self.text = text
+        self._widths = [0]  # up to the largest index measured so far
+
+    def update(self, text, from_index=0):
+        self.text = text
+        del self._widths[max(1, from_index + 1):]
+
+    def _prefix(self, index):
+        if isinstance(self.text, str):
+            return self.text[:index]
+        return self.text.slice(0, index)
+
+    def width(self, index):
+        widths = self._widths
+        if index >= len(widths):
+            widths.extend([None] * (index + 1 - len(widths)))
+        w = widths[index]
+        if w is None:
+            w = widths[index] = self.font.size(self._prefix(index))[0]
+        return w
+
+    def index_at(self, x):
+        # first index whose prefix is wider than x (len(text) + 1 if none);
+        # the range is found by doubling, so only prefixes up to about x are measured
+        length = len(self.text)
+        bound = 1
+        while bound <= length and self.width(bound) <= x:
+            bound *= 2
+        lo, hi = (bound // 2 + 1 if x >= 0 else 0), min(bound, length + 1)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.width(mid) > x:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+
+
 class TextInput(UIComponent):
+    __slots__ = (
+        "text", "buffer", "_prefix_widths", "allowed_char_mode", "padding",
+        "text_color", "caret_color", "selection_color", "cursor_index",
+        "selection_start", "selection_end", "dragging", "caret_visible",
+        "last_blinked_at", "_caret_interval", "_caret_timer",
+    )
+
     def __init__(
         self,
         rect,
@@ -151,48 +208,79 @@ class TextInput(UIComponent):
             hover_color=hover_color
         )
 
-        self.text_value = initial_text
+        self.buffer = TextBuffer(initial_text)
         self.text_color = text_color
         self.selection_color = selection_color
         self.caret_color = caret_color
         self.padding = padding
         self.allowed_char_mode=allowed_char_mode
 
-        # text render
+        # text render, only the characters that fit in the rect
         self.text = Text(
-            text_str=self.text_value,
+            text_str="",
             pos=(self.padding, self.padding),
             text_color=self.text_color
         )
         self.add_child(self.text)
+        self._prefix_widths = PrefixWidths(self.text.font, self.buffer)
+        self._refresh_text()
 
         # caret & selection
-        self.cursor_index = len(self.text_value)
+        self.cursor_index = len(self.buffer)
         self.selection_start = None
         self.selection_end = None
         self.dragging = False
 
-        # caret blink
+        # caret blink, a UIManager timer while focused
         self.caret_visible = True
-        self._caret_timer = 0
+        self._caret_timer = None
         self._caret_interval = 0.5
         self.last_blinked_at = time.time()
 
         #Keyboard repeat settings
         pygame.key.set_repeat(400, 50)
 
-    
+    @property
+    def text_value(self):
+        return self.buffer.get_text()
+
+    @text_value.setter
+    def text_value(self, value):
+        self.set_text(value)
+
+    def get_text(self):
+        return self.buffer.get_text()
+
+    def set_text(self, text):
+        self.buffer.set_text(text)
+        self.cursor_index = min(self.cursor_index, len(self.buffer))
+        self.selection_start = self.selection_end = None
+        self._text_changed(0)
+        self.mark_dirty()
+
+    def _text_changed(self, from_index):
+        # widths before the edit stay valid, the rope is never joined
+        self._prefix_widths.update(self.buffer, from_index)
+        self._refresh_text()
+
+    def _visible_end(self):
+        # characters drawn inside the rect, the last one may be cut off
+        width = self.rect[2] - 2 * self.padding
+        return min(len(self.buffer), self._prefix_widths.index_at(width))
+
+    def _refresh_text(self):
+        self.text.set_text(self.buffer.slice(0, self._visible_end()))
+
+    def set_size(self, width, height):
+        super().set_size(width, height)
+        self._refresh_text()
+
     def _mouse_to_index(self, mouse_x):
         local_x = mouse_x - self.absolute_rect[0] - self.padding
         if local_x <= 0:
             return 0
 
-        for i in range(len(self.text_value) + 1):
-            w = self.text.font.size(self.text_value[:i])[0]
-            if local_x < w:
-                return i
-
-        return len(self.text_value)
+        return min(self._prefix_widths.index_at(local_x), len(self.buffer))
     
     def on_click(self, event):
         # self.dragging = True
@@ -236,20 +324,18 @@ class TextInput(UIComponent):
                 if self.has_selection():
                     self.delete_selection()
                 elif self.cursor_index > 0:
-                    self.text_value = (
-                        self.text_value[:self.cursor_index - 1]
-                        + self.text_value[self.cursor_index:]
-                    )
+                    self.buffer.delete(self.cursor_index - 1, self.cursor_index)
                     self.cursor_index -= 1
+                    self._text_changed(self.cursor_index)
 
 
             #arrow keys
             elif event.key == pygame.K_UP:
                 self.cursor_index = 0
             elif event.key == pygame.K_DOWN:
-                self.cursor_index = len(self.text_value)
+                self.cursor_index = len(self.buffer)
             elif event.key == pygame.K_RIGHT:
-                if self.cursor_index <len(self.text_value):
+                if self.cursor_index <len(self.buffer):
                     self.cursor_index+=1
             elif event.key == pygame.K_LEFT:
                 if self.cursor_index > 0:
@@ -277,13 +363,8 @@ class TextInput(UIComponent):
                 elif self.allowed_char_mode == OCTAL_ONLY:
                     if c in "12345678":
                         self.insert_text(c)
-                
-                
-                
 
-            
-
-            self.text.set_text(self.text_value)
+        self.mark_dirty()
 
 
     def has_selection(self):
@@ -299,13 +380,14 @@ class TextInput(UIComponent):
     def get_selected_text(self):
         try:
             a, b = self.get_selection_range()
-            return self.text_value[a:b]
+            return self.buffer.slice(a, b)
         except:
             return ""
 
     def delete_selection(self):
         a, b = self.get_selection_range()
-        self.text_value = self.text_value[:a] + self.text_value[b:]
+        self.buffer.delete(a, b)
+        self._text_changed(a)
         self.cursor_index = a
         self.selection_start = self.selection_end = None
 
@@ -313,36 +395,62 @@ class TextInput(UIComponent):
         if self.has_selection():
             self.delete_selection()
 
-        self.text_value = (
-            self.text_value[:self.cursor_index]
-            + s
-            + self.text_value[self.cursor_index:]
-        )
+        self.buffer.insert(self.cursor_index, s)
+        self._text_changed(self.cursor_index)
         self.cursor_index += len(s)
+    def on_focus(self):
+        super().on_focus()
+        self.caret_visible = True
+        if self.ui_manager is not None and self._caret_timer is None:
+            self._caret_timer = self.ui_manager.schedule(self._caret_interval, self._blink_caret, repeat=True)
+
+    def on_blur(self):
+        super().on_blur()
+        if self._caret_timer is not None:
+            self.ui_manager.cancel(self._caret_timer)
+            self._caret_timer = None
+
+    def _blink_caret(self):
+        self.caret_visible = not self.caret_visible
+        self.mark_dirty()
+
     def update(self):
         if not self.focused:
             self.caret_visible = False
             return
+        if self._caret_timer is not None:
+            # blinking is driven by the UIManager timer
+            return
 
-        
         if time.time() - self.last_blinked_at >= self._caret_interval:
             self.last_blinked_at = time.time()
             self.caret_visible = not self.caret_visible
+            self.mark_dirty()
+
+    def visual_state(self):
+        # text changes go through the Text child, which clears this cache
+        return super().visual_state() + (
+            self.cursor_index, self.selection_start, self.selection_end, self.caret_visible,
+        )
 
     def draw(self, surface):
         super().draw(surface)
         self.update()
 
+        # only the visible prefix is measured
+        visible_end = self._visible_end()
+
         # SELECTION
         if self.has_selection():
             a, b = self.get_selection_range()
-            x1 = self.absolute_rect[0] + self.padding + self.text.font.size(self.text_value[:a])[0]
-            x2 = self.absolute_rect[0] + self.padding + self.text.font.size(self.text_value[:b])[0]
+            a, b = min(a, visible_end), min(b, visible_end)
+            x1 = self.absolute_rect[0] + self.padding + self._prefix_widths.width(a)
+            x2 = self.absolute_rect[0] + self.padding + self._prefix_widths.width(b)
 
             h = self.text.render.get_height()
             y = self.absolute_rect[1] + self.padding
 
-            pygame.draw.rect(
+            Draw.rect(
                 surface,
                 self.selection_color,
                 (x1, y, x2 - x1, h)
@@ -352,13 +460,11 @@ class TextInput(UIComponent):
             self.text.draw(surface)
 
         # CARET
-        if self.focused and self.caret_visible:
-            cx = self.absolute_rect[0] + self.padding + self.text.font.size(
-                self.text_value[:self.cursor_index]
-            )[0]
+        if self.focused and self.caret_visible and self.cursor_index <= visible_end:
+            cx = self.absolute_rect[0] + self.padding + self._prefix_widths.width(self.cursor_index)
             cy = self.absolute_rect[1] + self.padding
 
-            pygame.draw.rect(
+            Draw.rect(
                 surface,
                 self.caret_color,
                 (cx, cy, 2, self.text.render.get_height())
@@ -367,6 +473,13 @@ class TextInput(UIComponent):
 
 
 class TextInput2D(UIComponent):
+    __slots__ = (
+        "buffer", "font_size", "font_type", "font", "text_color", "caret_color",
+        "selection_color", "padding", "cursor_line", "cursor_col", "selection_start",
+        "selection_end", "dragging", "caret_visible", "last_blinked_at",
+        "_caret_interval", "_caret_timer", "scroll_offset", "_line_cache",
+    )
+
     def __init__(
         self,
         rect,
@@ -394,36 +507,66 @@ class TextInput2D(UIComponent):
         self.padding = padding
         self.font_size = font_size
         self.font_type = font_type
-        self.font = pygame.font.SysFont(self.font_type, self.font_size)
+        self.font = get_font(self.font_type, self.font_size)
+        self._line_cache = LineRenderCache(self.font)
 
-        self.lines = initial_text.split('\n') if initial_text else ['']
+        self.buffer = TextBuffer(initial_text)
         self.cursor_line = 0
         self.cursor_col = 0
 
+        # first visible line, only the lines inside the rect are rendered
+        self.scroll_offset = 0
+
         self.selection_start = None
         self.selection_end = None
         self.dragging = False
 
-        # caret blink
+        # caret blink, a UIManager timer while focused
         self.caret_visible = True
-        self._caret_timer = 0
+        self._caret_timer = None
         self._caret_interval = 0.5
         self.last_blinked_at = time.time()
     
         #Keyboard repeat settings
     
 
+    @property
+    def lines(self):
+        # read-only list-like view, edits go through self.buffer
+        return self.buffer.lines
+
     def get_text(self):
-        return '\n'.join(self.lines)
+        return self.buffer.get_text()
 
     def set_text(self, text):
-        self.lines = text.split('\n') if text else ['']
-        self.cursor_line = min(self.cursor_line, len(self.lines) - 1)
-        self.cursor_col = min(self.cursor_col, len(self.lines[self.cursor_line]))
+        self.buffer.set_text(text)
+        self.cursor_line = min(self.cursor_line, self.buffer.line_count() - 1)
+        self.cursor_col = min(self.cursor_col, self.buffer.line_length(self.cursor_line))
+        self.scroll_to(self.scroll_offset)
+        self.mark_dirty()
+        self.invalidate_surface_cache()
+
+    def _cursor_offset(self):
+        return self.buffer.line_col_to_offset(self.cursor_line, self.cursor_col)
 
     def _get_line_height(self):
         return self.font.get_height()
 
+    def _visible_line_count(self):
+        return max(1, int((self.rect[3] - 2 * self.padding) // self._get_line_height()))
+
+    def scroll_to(self, line):
+        line = max(0, min(line, len(self.lines) - self._visible_line_count()))
+        if line != self.scroll_offset:
+            self.scroll_offset = line
+            self.mark_dirty()
+
+    def _scroll_to_cursor(self):
+        if self.cursor_line < self.scroll_offset:
+            self.scroll_to(self.cursor_line)
+        elif self.cursor_line >= self.scroll_offset + self._visible_line_count():
+            self.scroll_to(self.cursor_line - self._visible_line_count() + 1)
+
     def _get_text_width(self, text):
         return self.font.size(text)[0]
 
@@ -432,17 +575,12 @@ class TextInput2D(UIComponent):
         local_y = mouse_y - self.absolute_rect[1] - self.padding
 
         line_height = self._get_line_height()
-        line = int(local_y // line_height)
+        line = self.scroll_offset + int(local_y // line_height)
         line = max(0, min(line, len(self.lines) - 1))
 
         line_text = self.lines[line]
-        col = 0
-        for i in range(len(line_text) + 1):
-            if self._get_text_width(line_text[:i]) > local_x:
-                col = i - 1
-                break
-        else:
-            col = len(line_text)
+        col = PrefixWidths(self.font, line_text).index_at(local_x) - 1
+        col = max(0, min(col, len(line_text)))
 
         return line, col
 
@@ -451,10 +589,16 @@ class TextInput2D(UIComponent):
         self.cursor_line, self.cursor_col = self._mouse_to_pos(event.pos[0], event.pos[1])
         self.selection_start = (self.cursor_line, self.cursor_col)
         self.selection_end = None
+        self.mark_dirty()
 
     def handle_event(self, event: pygame.event.Event):
+        if event.type == pygame.MOUSEWHEEL:
+            self.scroll_to(self.scroll_offset - event.y)
+            return
+
         if not self.focused or not self.enabled:
             return
+        self.mark_dirty()
 
         # MOUSE DRAG SELECTION
         if event.type == pygame.MOUSEMOTION and self.dragging:
@@ -472,27 +616,17 @@ class TextInput2D(UIComponent):
             if event.key == pygame.K_BACKSPACE:
                 if self.has_selection():
                     self.delete_selection()
-                elif self.cursor_col > 0:
-                    self.lines[self.cursor_line] = (
-                        self.lines[self.cursor_line][:self.cursor_col - 1]
-                        + self.lines[self.cursor_line][self.cursor_col:]
-                    )
-                    self.cursor_col -= 1
-                elif self.cursor_line > 0:
-                    # Join with previous line
-                    prev_line = self.lines[self.cursor_line - 1]
-                    self.cursor_col = len(prev_line)
-                    self.lines[self.cursor_line - 1] += self.lines[self.cursor_line]
-                    del self.lines[self.cursor_line]
-                    self.cursor_line -= 1
+                elif self.cursor_col > 0 or self.cursor_line > 0:
+                    # at column 0 this removes the newline and joins with the previous line
+                    offset = self._cursor_offset()
+                    self.buffer.delete(offset - 1, offset)
+                    self.cursor_line, self.cursor_col = self.buffer.offset_to_line_col(offset - 1)
 
             # ENTER
             elif event.key == pygame.K_RETURN:
                 if self.has_selection():
                     self.delete_selection()
-                line = self.lines[self.cursor_line]
-                self.lines[self.cursor_line] = line[:self.cursor_col]
-                self.lines.insert(self.cursor_line + 1, line[self.cursor_col:])
+                self.buffer.insert(self._cursor_offset(), '\n')
                 self.cursor_line += 1
                 self.cursor_col = 0
 
@@ -502,9 +636,9 @@ class TextInput2D(UIComponent):
                     self.cursor_col -= 1
                 elif self.cursor_line > 0:
                     self.cursor_line -= 1
-                    self.cursor_col = len(self.lines[self.cursor_line])
+                    self.cursor_col = self.buffer.line_length(self.cursor_line)
             elif event.key == pygame.K_RIGHT:
-                if self.cursor_col < len(self.lines[self.cursor_line]):
+                if self.cursor_col < self.buffer.line_length(self.cursor_line):
                     self.cursor_col += 1
                 elif self.cursor_line < len(self.lines) - 1:
                     self.cursor_line += 1
@@ -512,20 +646,21 @@ class TextInput2D(UIComponent):
             elif event.key == pygame.K_UP:
                 if self.cursor_line > 0:
                     self.cursor_line -= 1
-                    self.cursor_col = min(self.cursor_col, len(self.lines[self.cursor_line]))
+                    self.cursor_col = min(self.cursor_col, self.buffer.line_length(self.cursor_line))
             elif event.key == pygame.K_DOWN:
                 if self.cursor_line < len(self.lines) - 1:
                     self.cursor_line += 1
-                    self.cursor_col = min(self.cursor_col, len(self.lines[self.cursor_line]))
+                    self.cursor_col = min(self.cursor_col, self.buffer.line_length(self.cursor_line))
 
             # TYPING
             elif event.unicode and event.unicode.isprintable():
                 if self.has_selection():
                     self.delete_selection()
-                line = self.lines[self.cursor_line]
-                self.lines[self.cursor_line] = line[:self.cursor_col] + event.unicode + line[self.cursor_col:]
+                self.buffer.insert(self._cursor_offset(), event.unicode)
                 self.cursor_col += 1
 
+            self._scroll_to_cursor()
+
     def has_selection(self):
         return (
             self.selection_start is not None
@@ -551,41 +686,76 @@ class TextInput2D(UIComponent):
         start_line, start_col = self.selection_start
         end_line, end_col = self.selection_end
         if start_line == end_line:
-            line = self.lines[start_line]
             a, b = sorted((start_col, end_col))
-            self.lines[start_line] = line[:a] + line[b:]
+            line_start = self.buffer.line_start(start_line)
+            self.buffer.delete(line_start + a, line_start + b)
             self.cursor_line = start_line
             self.cursor_col = a
         # Multi-line delete not implemented yet
         self.selection_start = self.selection_end = None
 
+    def on_focus(self):
+        super().on_focus()
+        self.caret_visible = True
+        if self.ui_manager is not None and self._caret_timer is None:
+            self._caret_timer = self.ui_manager.schedule(self._caret_interval, self._blink_caret, repeat=True)
+
+    def on_blur(self):
+        super().on_blur()
+        # images cached before focus show the text before the edits
+        self.invalidate_surface_cache()
+        if self._caret_timer is not None:
+            self.ui_manager.cancel(self._caret_timer)
+            self._caret_timer = None
+
+    def _blink_caret(self):
+        self.caret_visible = not self.caret_visible
+        self.mark_dirty()
+
     def update(self):
         if not self.focused:
             self.caret_visible = False
             return
+        if self._caret_timer is not None:
+            # blinking is driven by the UIManager timer
+            return
 
         if time.time() - self.last_blinked_at >= self._caret_interval:
             self.last_blinked_at = time.time()
             self.caret_visible = not self.caret_visible
+            self.mark_dirty()
+
+    def visual_state(self):
+        return super().visual_state() + (self.scroll_offset,)
+
+    def can_use_surface_cache(self):
+        # edited while focused, cached only as a static view
+        return not self.focused
 
     def draw(self, surface):
         super().draw(surface)
         self.update()
 
         line_height = self._get_line_height()
-        y = self.absolute_rect[1] + self.padding
+        x = self.absolute_rect[0] + self.padding
+        top = self.absolute_rect[1] + self.padding - self.scroll_offset * line_height
+
+        old_clip = surface.get_clip()
+        surface.set_clip(old_clip.clip(self.absolute_rect))
 
-        for i, line in enumerate(self.lines):
-            render = self.font.render(line, True, self.text_color)
-            surface.blit(render, (self.absolute_rect[0] + self.padding, y))
-            y += line_height
+        # only the lines inside the rect (+1 partially visible line)
+        first = self.scroll_offset
+        last = min(len(self.lines), first + self._visible_line_count() + 1)
+        for i in range(first, last):
+            render = self._line_cache.get(self.lines[i], self.text_color)
+            surface.blit(render, (x, top + i * line_height))
 
         # CARET
         if self.focused and self.caret_visible:
-            caret_x = self.absolute_rect[0] + self.padding + self._get_text_width(self.lines[self.cursor_line][:self.cursor_col])
-            caret_y = self.absolute_rect[1] + self.padding + self.cursor_line * line_height
+            caret_x = x + self._get_text_width(self.lines[self.cursor_line][:self.cursor_col])
+            caret_y = top + self.cursor_line * line_height
 
-            pygame.draw.rect(
+            Draw.rect(
                 surface,
                 self.caret_color,
                 (caret_x, caret_y, 2, line_height)
@@ -597,14 +767,14 @@ class TextInput2D(UIComponent):
             if sel_range:
                 a, b = sel_range
                 line = self.lines[self.cursor_line]
-                x1 = self.absolute_rect[0] + self.padding + self._get_text_width(line[:a])
-                x2 = self.absolute_rect[0] + self.padding + self._get_text_width(line[:b])
-                y = self.absolute_rect[1] + self.padding + self.cursor_line * line_height
+                x1 = x + self._get_text_width(line[:a])
+                x2 = x + self._get_text_width(line[:b])
+                y = top + self.cursor_line * line_height
 
-                pygame.draw.rect(
+                Draw.rect(
                     surface,
                     self.selection_color,
                     (x1, y, x2 - x1, line_height)
                 )
 
-
+        surface.set_clip(old_clip)
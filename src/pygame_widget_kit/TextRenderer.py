@@ -0,0 +1,183 @@
+import time
+import pygame
+from collections import OrderedDict
+
+
+DEFAULT_TEXT_CACHE_SIZE = 512
+DEFAULT_LINE_CACHE_SIZE = 256
+ATLAS_PAGE_SIZE = 512
+
+
+class GlyphAtlas:
+    # Glyphs of one (font, color, antialias) packed into shared atlas pages.
+    # Strings are composed by blitting glyph areas next to each other, so a
+    # new string only costs font renders for characters never seen before.
+    # Kerning pairs are not applied, which is why the atlas is opt-in.
+    def __init__(self, font: pygame.font.Font, color, antialias):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.height = font.get_height()
+
+        self.pages: list[pygame.Surface] = []
+        self.glyphs = {}  # char -> (page, area)
+
+        self._x = 0
+        self._y = 0
+        self._row_height = 0
+
+    def _new_page(self, min_height):
+        page = pygame.Surface((ATLAS_PAGE_SIZE, max(ATLAS_PAGE_SIZE, min_height)), pygame.SRCALPHA)
+        self.pages.append(page)
+        self._x = self._y = self._row_height = 0
+        return page
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is not None:
+            return glyph
+
+        render = self.font.render(char, self.antialias, self.color)
+        w, h = render.get_size()
+
+        page = self.pages[-1] if self.pages else self._new_page(h)
+        if self._x + w > page.get_width():
+            self._x = 0
+            self._y += self._row_height
+            self._row_height = 0
+        if self._y + h > page.get_height():
+            page = self._new_page(h)
+
+        area = pygame.Rect(self._x, self._y, w, h)
+        if self.antialias:
+            page.blit(render, area, special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            page.blit(render, area)
+
+        self._x += w
+        self._row_height = max(self._row_height, h)
+
+        glyph = self.glyphs[char] = (page, area)
+        return glyph
+
+    def compose(self, text):
+        glyphs = [self.glyph(c) for c in text]
+        width = sum(area.width for _, area in glyphs)
+
+        surface = pygame.Surface((width, self.height), pygame.SRCALPHA)
+        x = 0
+        for page, area in glyphs:
+            surface.blit(page, (x, 0), area, special_flags=pygame.BLEND_RGBA_MAX)
+            x += area.width
+        return surface
+
+
+class TextRenderer:
+    # LRU cache of fully rendered strings keyed by (font, text, color, antialias, background).
+    # Returned surfaces are shared between widgets and must not be modified.
+    def __init__(self, max_cached=DEFAULT_TEXT_CACHE_SIZE, use_glyph_atlas=False):
+        self.max_cached = max_cached
+        self.use_glyph_atlas = use_glyph_atlas
+
+        self._cache = OrderedDict()
+        self._atlases = {}
+
+    def render(self, font: pygame.font.Font, text, antialias, color, background=None):
+        color = tuple(color)
+        if background is not None:
+            background = tuple(background)
+
+        key = (font, text, color, antialias, background)
+        surface = self._cache.get(key)
+        if surface is not None:
+            self._cache.move_to_end(key)
+            return surface
+
+        surface = self.render_uncached(font, text, antialias, color, background)
+        self._cache[key] = surface
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return surface
+
+    def render_uncached(self, font: pygame.font.Font, text, antialias, color, background=None):
+        # same output as render() without touching the string cache,
+        # used by widgets that keep their own bounded caches (LineRenderCache)
+        if _render_listener is None:
+            return self._render(font, text, antialias, color, background)
+
+        start = time.perf_counter()
+        surface = self._render(font, text, antialias, color, background)
+        _render_listener(time.perf_counter() - start)
+        return surface
+
+    def _render(self, font: pygame.font.Font, text, antialias, color, background):
+        if self.use_glyph_atlas and background is None:
+            atlas_key = (font, tuple(color), antialias)
+            atlas = self._atlases.get(atlas_key)
+            if atlas is None:
+                atlas = self._atlases[atlas_key] = GlyphAtlas(font, tuple(color), antialias)
+            return atlas.compose(text)
+        return font.render(text, antialias, color, background)
+
+    def clear(self):
+        self._cache.clear()
+        self._atlases.clear()
+
+
+class LineRenderCache:
+    # Bounded per-widget cache of line surfaces keyed by (line, color).
+    # Multi-line widgets only render the lines that are on screen, so the
+    # cache size depends on the viewport and not on the document length.
+    def __init__(self, font: pygame.font.Font, max_lines=DEFAULT_LINE_CACHE_SIZE, antialias=True):
+        self.font = font
+        self.max_lines = max_lines
+        self.antialias = antialias
+        self._lines = OrderedDict()
+
+    def set_font(self, font: pygame.font.Font):
+        if font is not self.font:
+            self.font = font
+            self._lines.clear()
+
+    def get(self, line, color):
+        key = (line, color)
+        surface = self._lines.get(key)
+        if surface is not None:
+            self._lines.move_to_end(key)
+            return surface
+
+        surface = _renderer.render_uncached(self.font, line, self.antialias, color)
+        self._lines[key] = surface
+        while len(self._lines) > self.max_lines:
+            self._lines.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._lines.clear()
+
+
+_renderer = TextRenderer()
+_render_listener = None  # called with the seconds spent on every cache miss
+
+
+def set_render_listener(listener):
+    # used by the profiler to count font renders
+    global _render_listener
+    _render_listener = listener
+
+
+def get_render_listener():
+    return _render_listener
+
+
+def get_text_renderer():
+    return _renderer
+
+
+def set_text_renderer(renderer: TextRenderer):
+    global _renderer
+    _renderer = renderer
+
+
+def render_text(font: pygame.font.Font, text, antialias, color, background=None):
+    return _renderer.render(font, text, antialias, color, background)
@@ -1,75 +1,385 @@
 import pygame
+from collections import OrderedDict
+from .Palette import intern_color, lighten_color, darken_color, dim_color
+from . import Draw
+
+# visual states kept per component by enable_surface_cache()
+DEFAULT_SURFACE_CACHE_STATES = 6
+
+# Cached absolute rects are stamped with (own generation, parent's stamp).
+# Moving a component bumps its generation, which only makes its own subtree
+# stale; roots are stamped with _root_stamp. _moves counts moves anywhere, a
+# rect checked since the last move is returned without looking at the parents.
+_root_stamp = object()
+_moves = 0
+
+
+def _moved():
+    global _moves
+    _moves += 1
+
+
+def invalidate_absolute_rects():
+    # every cached absolute rect of every tree is recomputed on next access
+    global _root_stamp
+    _root_stamp = object()
+    _moved()
+
+
+# tasks of coroutine callbacks, referenced until they finish
+_callback_tasks = set()
+
+
+def run_callback(callback, *args):
+    # Calls a widget callback. Coroutine results (async def callbacks) are
+    # scheduled on the running asyncio loop (see AsyncLoop.py). Without one
+    # they are rejected: running them here would block the frame loop.
+    result = callback(*args)
+    if not hasattr(result, "__await__"):
+        return result
+
+    import asyncio
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        if hasattr(result, "close"):
+            result.close()  # no "never awaited" warning
+        raise RuntimeError(
+            f"async callback {callback!r} needs a running asyncio loop, run the UI with AsyncLoop"
+        ) from None
+    task = loop.create_task(result)
+    _callback_tasks.add(task)
+    task.add_done_callback(_callback_tasks.discard)
+    return task
+
 
 class UIComponent:
+    # instances have no __dict__, subclasses list their own attributes in __slots__
+    __slots__ = (
+        "rect", "_absolute_rect", "_absolute_stamp", "_checked_at", "_generation", "_origin_override",
+        "parent", "children", "ui_manager", "_bounds",
+        "_visible", "enabled", "hovered", "active", "focused", "_z_index",
+        "border_color", "show_border", "color", "color_active", "hover_color",
+        "_surface_cache", "_surface_cache_max", "__weakref__",
+    )
+
+    # True for components whose poll() has to run every frame (UIManager.update),
+    # see needs_poll() for components that only poll for a while
+    polls = False
+    # True for layout containers (Layout.py) that position their own children
+    lays_out_children = False
+
     def __init__(self, rect, style=None,z_index = 0, color = None, border_color:tuple[int,int,int] = (0,255,0),hover_color = None):
         self.rect = rect    
-        self.absolute_rect = rect          
+        self._absolute_rect = rect
+        self._absolute_stamp = None
+        self._checked_at = -1
+        self._generation = 0
+        self._origin_override = None  # absolute (x, y) used instead of parent + rect
         #self.style = style or {}
 
         self.parent:UIComponent = None
         self.children:list[UIComponent] = []
         self.ui_manager = None
+        self._bounds = None  # cached _relative_bounds()
 
-        self.visible = True
+        self._visible = True
         self.enabled = True
 
         self.hovered = False
         self.active = False
         self.focused = False
-        self.z_index = z_index
+        self._z_index = z_index
 
-        self.border_color = border_color
+        color = intern_color(color)
+        self.border_color = intern_color(border_color)
         self.show_border = True if border_color is not None else False
-        self.color_active = tuple(max(c - 40, 0) for c in color) if color is not None else None
+        self.color_active = darken_color(color, 40) if color is not None else None
 
         self.color = color
 
-        self.hover_color = hover_color or (tuple(min(c + 30, 255) for c in color) if color is not None else None) 
+        self.hover_color = intern_color(hover_color) or (lighten_color(color, 30) if color is not None else None) 
+
+        # opt-in offscreen images per visual state, see enable_surface_cache()
+        self._surface_cache = None
+        self._surface_cache_max = 0
 
 
 
     def add_child(self, component:"UIComponent"):
         component.parent = self
         component.ui_manager = self.ui_manager
-        self.children.append(component)
+        self._insert_child(component)
+        self._invalidate_bounds()
+        self.invalidate_surface_cache()
         component.update_absolute_rect()
-    
-    def update_absolute_rect(self):
+        if self.ui_manager is not None:
+            self.ui_manager._attach(component)
+            component.mark_dirty()
+
+    def _insert_child(self, component:"UIComponent"):
+        # children are kept sorted by z_index, equal z_index keeps insertion order
+        children = self.children
+        i = len(children)
+        while i > 0 and children[i - 1].z_index > component.z_index:
+            i -= 1
+        children.insert(i, component)
+
+    def remove_child(self, component:"UIComponent"):
+        if component.parent is not self:
+            return
+        component.mark_dirty()
+        self.children.remove(component)
+        self._invalidate_bounds()
+        if self.ui_manager is not None:
+            self.ui_manager._detach(component)
+        component.parent = None
+
+    @property
+    def z_index(self):
+        return self._z_index
+
+    @z_index.setter
+    def z_index(self, z_index):
+        # children and the spatial index are kept in z order, so a change re-inserts
+        self.set_z_index(z_index)
+
+    def set_z_index(self, z_index):
+        if z_index == self._z_index:
+            return
+        self._z_index = z_index
         if self.parent is not None:
-            self.absolute_rect = (self.rect[0]+self.parent.absolute_rect[0],
-                            self.rect[1]+self.parent.absolute_rect[1],
-                            self.rect[2],
-                            self.rect[3])
-        else:
-            self.absolute_rect = self.rect
+            self.parent.children.remove(self)
+            self.parent._insert_child(self)
+        if self.ui_manager is not None:
+            self.ui_manager._spatial_index.insert(self)
+            self.ui_manager._tree_changed()
+        self.mark_dirty()
+
+    @property
+    def visible(self):
+        return self._visible
+
+    @visible.setter
+    def visible(self, visible):
+        # the area of the subtree is redrawn before hiding and after showing
+        if visible == self._visible:
+            return
+        self._mark_subtree_dirty()
+        self._visible = visible
+        self._invalidate_bounds()
+        self._mark_subtree_dirty()
+        if self.ui_manager is not None:
+            self.ui_manager._tree_changed()
+        # layout containers skip hidden children
+        self.invalidate_layout()
+
+    def _mark_subtree_dirty(self):
+        if self.parent is not None:
+            self.parent.invalidate_surface_cache()
+        if self.ui_manager is not None and self._visible:
+            self.ui_manager.add_dirty_rect(self._subtree_bounds())
+
+    def mark_dirty(self):
+        # a changed child makes the cached images of its ancestors stale
+        if self.parent is not None:
+            self.parent.invalidate_surface_cache()
+
+        # report the area that needs a redraw to the UIManager
+        if self.ui_manager is not None and self.visible:
+            self.ui_manager.add_dirty_rect(self.absolute_rect)
     
-        for child in self.children:
-            child.update_absolute_rect()
+    @property
+    def absolute_rect(self):
+        # resolved on demand, a moved subtree costs nothing until it is drawn or hit tested
+        if self._checked_at != _moves:
+            self._resolve_absolute_rect()
+        return self._absolute_rect
+
+    def _resolve_absolute_rect(self):
+        # recomputes the cached rect if this component or an ancestor moved since,
+        # returns the stamp children compare against. Parents are checked first
+        # while drawing and hit testing, so the walk up usually stops at once.
+        if self._checked_at == _moves:
+            return self._absolute_stamp
+        if self._origin_override is not None or self.parent is None:
+            parent_stamp = _root_stamp
+        else:
+            parent_stamp = self.parent._resolve_absolute_rect()
+        stamp = self._absolute_stamp
+        if stamp is None or stamp[0] != self._generation or stamp[1] is not parent_stamp:
+            self._absolute_rect = self._compute_absolute_rect()
+            stamp = self._absolute_stamp = (self._generation, parent_stamp)
+        self._checked_at = _moves
+        return stamp
+
+    def _compute_absolute_rect(self):
+        rect = self.rect
+        if self._origin_override is not None:
+            return (self._origin_override[0], self._origin_override[1], rect[2], rect[3])
+        if self.parent is None:
+            return rect
+        parent_rect = self.parent.absolute_rect
+        return (rect[0] + parent_rect[0], rect[1] + parent_rect[1], rect[2], rect[3])
+
+    def update_absolute_rect(self):
+        # call after changing rect; the subtree is recomputed lazily
+        self._generation += 1
+        _moved()
+        self._invalidate_bounds()
+        if self.ui_manager is not None:
+            self.ui_manager._component_moved(self)
     
     def set_pos(self,pos_x,pos_y):
+        self.mark_dirty()
         self.rect = (pos_x,pos_y,self.rect[2],self.rect[3])
         self.update_absolute_rect()    
+        self.mark_dirty()
+
+    def set_size(self, width, height):
+        if (width, height) == tuple(self.rect[2:4]):
+            return
+        self.mark_dirty()
+        self.rect = (self.rect[0], self.rect[1], width, height)
+        self.update_absolute_rect()
+        self.invalidate_surface_cache()
+        self.mark_dirty()
+        self.invalidate_layout()
+
+    def invalidate_layout(self):
+        # preferred size changed: the enclosing layout container has to re-arrange
+        if self.parent is not None and self.parent.lays_out_children:
+            self.parent.invalidate_layout()
 
     
     
     def handle_event(self, event):
         pass
 
+    def needs_poll(self):
+        # call ui_manager.update_polling(self) when the answer changes
+        return self.polls
+
     def on_hover(self, is_hover):
-        self.hovered = is_hover
+        if self.hovered != is_hover:
+            self.hovered = is_hover
+            self.mark_dirty()
+
+    def on_hover_within(self, is_within):
+        # the pointer entered/left this component or one of its children
+        pass
 
     def on_click(self,event):
         pass
 
     def on_focus(self):
         self.focused = True
+        self.mark_dirty()
 
     def on_blur(self):
         self.focused = False
+        self.mark_dirty()
     
     def draw_child(self, surface: pygame.Surface):
-        for child in sorted(self.children, key=lambda c: c.z_index):
-            child.draw(surface)
+        # skip subtrees outside the clip (dirty-rect mode)
+        clip = surface.get_clip()
+        profiler = self.ui_manager.profiler if self.ui_manager is not None else None
+        for child in self.children:
+            if child._visible and clip.colliderect(child._subtree_bounds()):
+                if profiler is None:
+                    child.draw_cached(surface)
+                else:
+                    profiler.begin_draw(child)
+                    child.draw_cached(surface)
+                    profiler.end_draw()
+
+    # -------------------------
+    # SURFACE CACHE
+    # -------------------------
+    def enable_surface_cache(self, max_states=DEFAULT_SURFACE_CACHE_STATES):
+        # draw() output (with children) is rendered once per visual_state()
+        # into an offscreen surface, later frames only blit it
+        self._surface_cache = OrderedDict()
+        self._surface_cache_max = max_states
+
+    def disable_surface_cache(self):
+        self._surface_cache = None
+
+    def invalidate_surface_cache(self):
+        # content changed: drop the cached images of this component and its ancestors
+        node = self
+        while node is not None:
+            if node._surface_cache:
+                node._surface_cache.clear()
+            node = node.parent
+
+    def visual_state(self):
+        # everything draw() depends on besides content, part of the cache key
+        return (self.hovered, self.active, self.enabled, self.focused)
+
+    def can_use_surface_cache(self):
+        return True
+
+    def _subtree_bounds(self):
+        # absolute rect covering this component and its visible children
+        rect = self.absolute_rect
+        return self._relative_bounds().move(rect[0], rect[1])
+
+    def _relative_bounds(self):
+        # relative to absolute_rect, so moving a component keeps its own bounds
+        bounds = self._bounds
+        if bounds is None:
+            bounds = pygame.Rect(0, 0, self.rect[2], self.rect[3])
+            for child in self.children:
+                if child._visible:
+                    bounds.union_ip(child._relative_bounds().move(child.rect[0], child.rect[1]))
+            self._bounds = bounds
+        return bounds
+
+    def _invalidate_bounds(self):
+        # size, position, children or visibility changed: the cached bounds
+        # of this component and its ancestors are recomputed on next use
+        self._bounds = None
+        node = self.parent
+        while node is not None and node._bounds is not None:
+            node._bounds = None
+            node = node.parent
+
+    def draw_cached(self, surface: pygame.Surface):
+        cache = self._surface_cache
+        if cache is None or not self.visible or not self.can_use_surface_cache():
+            self.draw(surface)
+            return
+
+        bounds = self._subtree_bounds()
+        key = (self.visual_state(), bounds.size)
+        entry = cache.get(key)
+        if entry is None:
+            image = pygame.Surface(bounds.size, pygame.SRCALPHA)
+            # offset from absolute_rect, the subtree may overflow the component
+            dx = bounds.x - self.absolute_rect[0]
+            dy = bounds.y - self.absolute_rect[1]
+
+            # draw the subtree at the image origin, the spatial index is not touched
+            self._origin_override = (-dx, -dy)
+            self._generation += 1
+            _moved()
+            try:
+                self.draw(image)
+            finally:
+                self._origin_override = None
+                self._generation += 1
+                _moved()
+
+            entry = cache[key] = (image, dx, dy)
+            while len(cache) > self._surface_cache_max:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+
+        # pygame's blitter keeps straight (not premultiplied) alpha in the image
+        image, dx, dy = entry
+        surface.blit(image, (self.absolute_rect[0] + dx, self.absolute_rect[1] + dy))
 
     def is_in_rect(self,pos):
         if self.absolute_rect[0]<pos[0] < self.absolute_rect[0]+self.absolute_rect[2] and \
@@ -82,7 +392,9 @@ class UIComponent:
         if self.visible == False or self.enabled==False:
             return
         
-        self.hovered = is_hover
+        if self.hovered != is_hover:
+            self.hovered = is_hover
+            self.mark_dirty()
         if is_hover == False:
             for child in self.children:
                 child.set_hover(False)
@@ -101,7 +413,7 @@ class UIComponent:
 
         if not self.enabled:
             if fill_color is not None:
-                fill_color = tuple(c // 2 for c in fill_color)
+                fill_color = dim_color(fill_color)
 
         elif self.active:
             if fill_color is not None:
@@ -112,7 +424,7 @@ class UIComponent:
                 fill_color = self.hover_color
 
         if fill_color is not None:    
-            pygame.draw.rect(surface, fill_color, self.absolute_rect, 0)
+            Draw.rect(surface, fill_color, self.absolute_rect, 0)
 
         if self.show_border:
 
@@ -123,7 +435,7 @@ class UIComponent:
                 border_color = self.border_color
                 
             if border_color:
-                pygame.draw.rect(surface, border_color, self.absolute_rect, 2)
+                Draw.rect(surface, border_color, self.absolute_rect, 2)
 
         self.draw_child(surface)
     
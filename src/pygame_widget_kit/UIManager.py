@@ -1,20 +1,127 @@
+import math
+import time
+import heapq
+import threading
 import pygame
 from .Widget import*
+from .SpatialIndex import SpatialGrid
+from .Profiler import FrameProfiler
+
+# above this many merged dirty rects, they are reduced to their union
+MAX_DIRTY_RECTS = 16
+# next_wakeup() waits at most this many seconds while a component needs poll()
+POLL_INTERVAL = 0.1
+# posted by wake(), wakes a waiting wait_events()
+WAKEUP_EVENT = pygame.event.custom_type()
+
+
+class Timer:
+    # handle returned by UIManager.schedule(), stopped with UIManager.cancel(timer)
+    __slots__ = ("deadline", "interval", "callback", "args", "cancelled")
+
+    def __init__(self, deadline, interval, callback, args):
+        self.deadline = deadline
+        self.interval = interval  # None: tek sefer
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
 
 class UIManager:
-    def __init__(self, root):
+    def __init__(self, root, background_color=None):
         self.root = root
         self.focused = None
         self.active = None
         self.modal = None  #  dropdown / modal
+        self.hover_path = []  # root -> hovered component
+        self.background_color = background_color
+
+        # dirty-rect render
+        self._dirty_rects = []
+        self._full_redraw = True
+
+        # components whose poll() runs every frame (dict as an ordered set)
+        self._pollers = {}
+
+        # set by enable_profiling()
+        self.profiler = None
+
+        # bumped on every tree or geometry change, part of the hit cache key
+        self._tree_version = 0
+        # only filled during process_events(): (pos, root, version) -> target
+        self._hit_cache = None
+        # moved subtrees, the spatial index is updated on the next hit test
+        self._pending_moves = {}
+        # outermost layout containers waiting for a layout pass (Layout.py)
+        self._pending_layouts = {}
+
+        # updates from other threads: (widget, method) -> args, the last one wins
+        self._posted_updates = {}
+        self._posted_lock = threading.Lock()
+
+        # timers: heap of (deadline, seq, Timer) on time.monotonic()
+        self._timers = []
+        self._timer_seq = 0
+
         self._bind_manager(root)
+        self._spatial_index = SpatialGrid(root)
     
     def _bind_manager(self, component):
         component.ui_manager = self
+        if component.needs_poll():
+            self._pollers[component] = None
+        if component.lays_out_children and not component._layout_valid:
+            if component.parent is None or not component.parent.lays_out_children:
+                self._pending_layouts[component] = None
         for child in component.children:
             self._bind_manager(child)
 
+    def _attach(self, component):
+        # newly added subtree: bind the manager and add it to the spatial index
+        self._bind_manager(component)
+        self._spatial_index.insert(component)
+        self._tree_version += 1
+
+    def _detach(self, component):
+        # drop every reference to a subtree removed from the tree
+        self._spatial_index.remove(component)
+        self._tree_version += 1
+
+        def contains(node):
+            while node is not None:
+                if node is component:
+                    return True
+                node = node.parent
+            return False
+
+        if contains(self.focused):
+            self._dispatch(self.focused.on_blur)
+            self.focused = None
+        if contains(self.active):
+            self.active = None
+        if contains(self.modal):
+            self.modal = None
+        if component in self.hover_path:
+            index = self.hover_path.index(component)
+            for node in self.hover_path[index:]:
+                node.hovered = False
+            self.hover_path = self.hover_path[:index]
+
+        def unbind(node):
+            node.ui_manager = None
+            self._pollers.pop(node, None)
+            for child in node.children:
+                unbind(child)
+
+        unbind(component)
+
     def hit_test(self, component:UIComponent, pos):
+        # without a modal, searches from the root go through the spatial index
+        if component is self.root and not self.modal:
+            self.update_layout()
+            self._flush_moves()
+            return self._spatial_index.query(pos)
+
         if not component.visible or not component.enabled:
             return None
 
@@ -23,10 +130,8 @@ class UIManager:
         if self.modal:
             children = self.modal.children
 
-        children = sorted(children, key=lambda c: c.z_index)
-        children.reverse()
-
-        for child in children:
+        # children are kept sorted by z_index, the topmost is tested first
+        for child in reversed(children):
             if isinstance(child,Widget):
                 hit = self.hit_test(child, pos)
                 if hit:
@@ -41,7 +146,99 @@ class UIManager:
         return None
     
 
+    # -------------------------
+    # PROFILING
+    # -------------------------
+    def enable_profiling(self, history=120, callback=None):
+        # every render() ends a frame, the last `history` frames are kept
+        if self.profiler is None:
+            self.profiler = FrameProfiler(history, callback)
+            self.profiler.install()
+        return self.profiler
+
+    def disable_profiling(self):
+        if self.profiler is not None:
+            self.profiler.uninstall()
+            self.profiler = None
+
+    def _hit(self, root, pos):
+        cache = self._hit_cache
+        if cache is not None:
+            key = (tuple(pos), root, self._tree_version)
+            if key in cache:
+                return cache[key]
+
+        if self.profiler is None:
+            target = self.hit_test(root, pos)
+        else:
+            start = time.perf_counter()
+            target = self.hit_test(root, pos)
+            self.profiler.add_time("hit_test", time.perf_counter() - start)
+            self.profiler.count("hit_tests")
+
+        if cache is not None:
+            cache[key] = target
+        return target
+
+    def _component_moved(self, component):
+        self._pending_moves[component] = None
+        self._tree_version += 1
+
+    def _flush_moves(self):
+        if self._pending_moves:
+            for component in self._pending_moves:
+                self._spatial_index.move_subtree(component)
+            self._pending_moves = {}
+
+    def _tree_changed(self):
+        # added, removed or moved components invalidate cached hit results
+        self._tree_version += 1
+
+    def _dispatch(self, handler, *args):
+        # calls a component handler, its time is recorded per component while profiling
+        if self.profiler is None:
+            return handler(*args)
+        start = time.perf_counter()
+        result = handler(*args)
+        self.profiler.add_event_time(handler.__self__, time.perf_counter() - start)
+        return result
+
+    def process_events(self, events):
+        # handles a whole pygame.event.get() list in order. Of consecutive MOUSEMOTION
+        # events only the last one is hit tested and updates hover, the others
+        # only go to the dragged (active) component.
+        self._hit_cache = {}
+        try:
+            i = 0
+            count = len(events)
+            while i < count:
+                event = events[i]
+                if event.type == pygame.MOUSEMOTION:
+                    last = i
+                    while last + 1 < count and events[last + 1].type == pygame.MOUSEMOTION:
+                        last += 1
+                    if self.active is not None:
+                        for motion in events[i:last]:
+                            self._dispatch(self.active.handle_event, motion)
+                    i = last
+                    self.handle_event(events[i])
+                else:
+                    self.handle_event(event)
+                    # click / key handlers may have changed the tree
+                    self._tree_changed()
+                i += 1
+        finally:
+            self._hit_cache = None
+
     def handle_event(self, event: pygame.event.Event):
+        if self.profiler is None:
+            return self._handle_event(event)
+        start = time.perf_counter()
+        self._handle_event(event)
+        self.profiler.add_time("handle_event", time.perf_counter() - start)
+        self.profiler.count("events")
+
+    def _handle_event(self, event: pygame.event.Event):
 
         # 🔹 Event'in başlayacağı root
         root = self.modal if self.modal else self.root
@@ -51,7 +248,7 @@ class UIManager:
         # -------------------------
         if event.type == pygame.MOUSEBUTTONDOWN:
 
-            target = self.hit_test(root, event.pos)
+            target = self._hit(root, event.pos)
 
             # 👉 Modal açık ama DIŞINA tıklandıysa
             if self.modal and not target:
@@ -64,15 +261,18 @@ class UIManager:
             if target:
                 self.active = target
                 target.active = True
-                target.handle_event(event)
+                target.mark_dirty()
 
-                # focus yönetimi
+                # focus before handle_event, so the component receives the press
+                # that focuses it (e.g. TextInput drag selection)
                 if self.focused and self.focused != target:
-                    self.focused.on_blur()
+                    self._dispatch(self.focused.on_blur)
 
-                target.on_focus()
+                self._dispatch(target.on_focus)
                 self.focused = target
 
+                self._dispatch(target.handle_event, event)
+
         # -------------------------
         # MOUSE BUTTON UP
         # -------------------------
@@ -80,10 +280,11 @@ class UIManager:
 
             if self.active:
                 self.active.active = False
+                self.active.mark_dirty()
 
                 # click sayılır mı?
                 if self.active.is_in_rect(event.pos):
-                    self.active.on_click(event)
+                    self._dispatch(self.active.on_click, event)
 
                 self.active = None
 
@@ -92,35 +293,263 @@ class UIManager:
         # -------------------------
         elif event.type == pygame.MOUSEMOTION:
 
-            target = self.hit_test(root, event.pos)
+            target = self._hit(root, event.pos)
+            self._set_hover_target(target)
 
-            # hover değiştiyse güncelle
-            def clear_hover(widget):
-                widget.hovered = False
-                for c in widget.children:
-                    clear_hover(c)
-
-            clear_hover(self.root)
+            # the pressed component gets the motion for dragging (e.g. TextInput selection)
+            if self.active:
+                self._dispatch(self.active.handle_event, event)
+                self.active.mark_dirty()
 
-            if target:
-                target.hovered = True
+        # -------------------------
+        # MOUSE WHEEL
+        # -------------------------
+        elif event.type == pygame.MOUSEWHEEL:
+            # the wheel goes to the component under the mouse
+            if self.hover_path:
+                self._dispatch(self.hover_path[-1].handle_event, event)
 
         # -------------------------
         # KEYBOARD
         # -------------------------
         elif event.type == pygame.KEYDOWN:
             if self.focused:
-                self.focused.handle_event(event)
+                self._dispatch(self.focused.handle_event, event)
 
     def _handle_hover(self, pos):
-        target = self.hit_test(self.modal or self.root, pos)
+        target = self._hit(self.modal or self.root, pos)
+        self._set_hover_target(target)
+
+    def _set_hover_target(self, target):
+        # build the root -> target path, only nodes entering or leaving it are updated
+        path = []
+        node = target
+        while node is not None:
+            path.append(node)
+            node = node.parent
+        path.reverse()
+
+        old_path = self.hover_path
+        common = 0
+        while common < len(path) and common < len(old_path) and path[common] is old_path[common]:
+            common += 1
+
+        # hovered is only set on the topmost (leaf) component, its ancestors learn
+        # about entering/leaving the path through on_hover_within
+        old_target = old_path[-1] if old_path else None
+        if old_target is not None and old_target is not target:
+            self._dispatch(old_target.on_hover, False)
+
+        for node in reversed(old_path[common:]):
+            self._dispatch(node.on_hover_within, False)
+        for node in path[common:]:
+            self._dispatch(node.on_hover_within, True)
+
+        if target is not None and target is not old_target:
+            self._dispatch(target.on_hover, True)
+
+        self.hover_path = path
+
+    # -------------------------
+    # FRAME UPDATE
+    # -------------------------
+    def update(self):
+        # call once per frame (e.g. delivers the asynchronous file dialog result)
+        self._apply_posted_updates()
+        self._run_timers()
+        for component in list(self._pollers):
+            component.poll()
+
+    def update_polling(self, component):
+        # component.needs_poll() changed: add it to or remove it from the pollers
+        if component.needs_poll() and component.ui_manager is self:
+            self._pollers[component] = None
+        else:
+            self._pollers.pop(component, None)
+
+    def post_update(self, widget, method_name, *args):
+        # thread-safe, e.g. post_update(label, "set_text", "42 ms"). Applied at
+        # the start of the next update(); only the last call per widget and
+        # method is kept, so a fast producer costs one call per frame.
+        key = (widget, method_name)
+        with self._posted_lock:
+            first = not self._posted_updates
+            self._posted_updates.pop(key, None)
+            self._posted_updates[key] = args
+        if first:
+            self.wake()
+
+    def _apply_posted_updates(self):
+        if not self._posted_updates:
+            return
+        with self._posted_lock:
+            updates = self._posted_updates
+            self._posted_updates = {}
+        for (widget, method_name), args in updates.items():
+            self._dispatch(getattr(widget, method_name), *args)
+
+    # -------------------------
+    # SCHEDULER / IDLE
+    # -------------------------
+    def schedule(self, delay, callback, *args, repeat=False):
+        # callback(*args) runs in update() after delay seconds, every delay seconds with repeat=True
+        timer = Timer(time.monotonic() + delay, delay if repeat else None, callback, args)
+        self._push_timer(timer)
+        return timer
+
+    def cancel(self, timer):
+        if timer is not None:
+            timer.cancelled = True
+
+    def _push_timer(self, timer):
+        self._timer_seq += 1
+        heapq.heappush(self._timers, (timer.deadline, self._timer_seq, timer))
+
+    def _run_timers(self):
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            timer = heapq.heappop(self._timers)[2]
+            if timer.cancelled:
+                continue
+            if timer.interval is None:
+                timer.cancelled = True
+            else:
+                # missed repeats are not run in a burst
+                timer.deadline = max(timer.deadline + timer.interval, now)
+                self._push_timer(timer)
+            timer.callback(*timer.args)
+
+    def next_wakeup(self):
+        # seconds until update()/render() have work again:
+        # 0 if work is pending, None if only input can change the screen
+        if self._full_redraw or self._dirty_rects or self._posted_updates or self._pending_layouts:
+            return 0.0
+
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        timeout = None
+        if self._timers:
+            timeout = max(0.0, self._timers[0][0] - time.monotonic())
+        if self._pollers:
+            timeout = POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL)
+        return timeout
+
+    def wait_events(self):
+        # blocks until input arrives or next_wakeup() expires, returns the events:
+        # while running: ui.process_events(ui.wait_events()); ui.update(); ui.render(screen)
+        timeout = self.next_wakeup()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if deadline is None:
+                event = pygame.event.wait()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # due (or work is pending): return without waiting, wait(0) would block forever
+                    events = pygame.event.get()
+                    break
+                # rounded up, otherwise it wakes before the timer is due
+                event = pygame.event.wait(math.ceil(remaining * 1000))
+            if event.type != pygame.NOEVENT:
+                events = [event]
+                events.extend(pygame.event.get())
+                break
+            # wait() may return before the deadline, wait for the rest
+        return [event for event in events if event.type != WAKEUP_EVENT]
+
+    def wake(self):
+        # thread-safe: makes a waiting wait_events() return at once
+        try:
+            pygame.event.post(pygame.event.Event(WAKEUP_EVENT))
+        except pygame.error:
+            # the event system is not initialized, so nobody is waiting
+            pass
+
+    # -------------------------
+    # DIRTY-RECT RENDER
+    # -------------------------
+    def add_dirty_rect(self, rect):
+        self._dirty_rects.append(pygame.Rect(rect))
+
+    def invalidate(self):
+        # redraw the whole screen on the next render
+        self._full_redraw = True
+
+    def _merge_dirty_rects(self, bounds: pygame.Rect):
+        merged: list[pygame.Rect] = []
+        for rect in self._dirty_rects:
+            rect = rect.clip(bounds)
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+
+            i = 0
+            while i < len(merged):
+                if merged[i].colliderect(rect):
+                    rect.union_ip(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+
+        if len(merged) > MAX_DIRTY_RECTS:
+            merged = [merged[0].unionall(merged[1:])]
+        return merged
+
+    def _draw_root(self, surface: pygame.Surface):
+        if self.profiler is None:
+            self.root.draw(surface)
+            return
+        self.profiler.begin_draw(self.root)
+        self.root.draw(surface)
+        self.profiler.end_draw()
+
+    def render(self, surface: pygame.Surface):
+        if self.profiler is None:
+            return self._render(surface)
+        start = time.perf_counter()
+        rects = self._render(surface)
+        self.profiler.add_time("draw", time.perf_counter() - start)
+        self.profiler.end_frame()
+        return rects
+
+    # -------------------------
+    # LAYOUT
+    # -------------------------
+    def update_layout(self):
+        # runs the pending layouts, called automatically before render and hit testing
+        while self._pending_layouts:
+            pending = self._pending_layouts
+            self._pending_layouts = {}
+            for container in pending:
+                if container.ui_manager is self:
+                    container.layout()
+
+    def _render(self, surface: pygame.Surface):
+        # draws only the damaged areas, the returned list is for pygame.display.update(rects)
+        self.update_layout()
+        if self.focused is not None and hasattr(self.focused, "update"):
+            self.focused.update()
+
+        if self._full_redraw:
+            self._full_redraw = False
+            self._dirty_rects = []
+            if self.background_color is not None:
+                surface.fill(self.background_color)
+            self._draw_root(surface)
+            return [surface.get_rect()]
+
+        if not self._dirty_rects:
+            return []
 
-        def clear_hover(widget):
-            widget.hovered = False
-            for c in widget.children:
-                clear_hover(c)
+        rects = self._merge_dirty_rects(surface.get_rect())
+        self._dirty_rects = []
 
-        clear_hover(self.root)
+        old_clip = surface.get_clip()
+        for rect in rects:
+            surface.set_clip(rect)
+            if self.background_color is not None:
+                surface.fill(self.background_color, rect)
+            self._draw_root(surface)
+        surface.set_clip(old_clip)
 
-        if target:
-            target.hovered = True
+        return rects
@@ -3,11 +3,20 @@ from .UIComponent import *
 
 
 class Widget(UIComponent):
+    __slots__ = ()
+
     def __init__(self, rect, style=None, z_index=0, color=None, border_color = None , hover_color=None):
         if hover_color is None:
             hover_color = color
         super().__init__(rect, style, z_index, color, border_color, hover_color)
     
+    def on_hover(self, is_hover):
+        # containers look the same while hovered, no need to redraw them
+        if self.hover_color == self.color:
+            self.hovered = is_hover
+        else:
+            super().on_hover(is_hover)
+
     def draw(self, surface):
 
         return super().draw(surface)
@@ -1,11 +1,64 @@
-from .UIComponent import *
-from .Widget import *
-from .Text import *
-from .Button import *
-from .UIManager import*
-from .Select import*
-from .TextInput import*
-from .Radio import*
-from .Slider import*
-from .TextArea import*
-from .TextArea import*
+import sys as _sys
+from importlib import import_module as _import_module
+from types import ModuleType as _ModuleType
+
+# Submodules are imported on first attribute access, so e.g. the file dialog
+# helper (multiprocessing, tkinter) is only loaded when ChooseFileButton is used.
+_LAZY_MODULES = {
+    "UIComponent": ["DEFAULT_SURFACE_CACHE_STATES", "invalidate_absolute_rects", "run_callback", "UIComponent"],
+    "Widget": ["Widget"],
+    "Text": ["Text"],
+    "Button": ["Button", "ChooseFileButton"],
+    "UIManager": ["MAX_DIRTY_RECTS", "POLL_INTERVAL", "WAKEUP_EVENT", "Timer", "UIManager"],
+    "Select": ["DEFAULT_MAX_VISIBLE_OPTIONS", "TYPEAHEAD_TIMEOUT", "OptionIndex", "SelectOption", "Select"],
+    "TextInput": ["ALLOW_ALL_CHARS", "NUMBER_ONLY", "TEXT_ONLY", "HEX_ONLY", "BINARY_ONLY", "OCTAL_ONLY",
+                  "PrefixWidths", "TextInput", "TextInput2D"],
+    "Radio": ["Radio", "RadioOption"],
+    "Slider": ["Slider"],
+    "TextArea": ["TextArea", "WrappedLinesView"],
+    "FontCache": ["DEFAULT_FONT_CACHE_SIZE", "get_font", "preload_fonts", "set_font_cache_size", "clear_font_cache"],
+    "TextRenderer": ["DEFAULT_TEXT_CACHE_SIZE", "DEFAULT_LINE_CACHE_SIZE", "ATLAS_PAGE_SIZE", "GlyphAtlas",
+                     "TextRenderer", "LineRenderCache", "set_render_listener", "get_render_listener", "get_text_renderer",
+                     "set_text_renderer", "render_text"],
+    "TextBuffer": ["CHUNK_SIZE", "TextBuffer", "LinesView"],
+    "Profiler": ["FrameStats", "FrameProfiler", "ProfilerOverlay"],
+    "Palette": ["intern_color", "lighten_color", "darken_color", "dim_color"],
+    "Layout": ["ALIGN_START", "ALIGN_CENTER", "ALIGN_END", "ALIGN_STRETCH", "stack_offsets",
+               "LayoutContainer", "Row", "Column", "Grid", "Stack"],
+    "SpatialIndex": ["DEFAULT_CELL_SIZE", "SpatialGrid"],
+    "AsyncLoop": ["DEFAULT_FPS", "DEFAULT_IDLE_FPS", "AsyncLoop", "run_ui"],
+    "FileDialog": ["file_dialog_worker", "FileDialogService", "get_file_dialog_service"],
+}
+
+# public name -> submodule that defines it
+_LAZY_ATTRS = {name: module for module, names in _LAZY_MODULES.items() for name in names}
+
+# star imports stay light: the file dialog helpers are only reachable as attributes
+__all__ = [name for name, module in _LAZY_ATTRS.items() if module != "FileDialog"]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(_import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
+
+class _Package(_ModuleType):
+    # Most submodules share their name with the class they define. Importing
+    # a submodule binds it as a package attribute (pygame_widget_kit.Button
+    # would become the module), so such bindings are replaced by the class.
+    def __setattr__(self, name, value):
+        if isinstance(value, _ModuleType) and _LAZY_ATTRS.get(name) == name \
+                and value.__name__ == f"{__name__}.{name}":
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+_sys.modules[__name__].__class__ = _Package
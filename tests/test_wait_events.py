@@ -0,0 +1,57 @@
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from pygame_widget_kit import POLL_INTERVAL, UIManager
+from pygame_widget_kit.UIComponent import UIComponent
+
+
+class _Poller(UIComponent):
+    __slots__ = ("polled",)
+    polls = True
+
+    def __init__(self):
+        super().__init__((0, 0, 10, 10))
+        self.polled = 0
+
+    def poll(self):
+        self.polled += 1
+
+
+@pytest.fixture
+def ui():
+    pygame.display.init()
+    pygame.display.set_mode((100, 100))
+    root = UIComponent((0, 0, 100, 100))
+    manager = UIManager(root)
+    manager.render(pygame.display.get_surface())
+    pygame.event.clear()
+    yield manager
+    pygame.display.quit()
+
+
+def test_wait_events_returns_after_poll_interval(ui):
+    poller = _Poller()
+    ui.root.add_child(poller)
+    ui.render(pygame.display.get_surface())
+    assert ui.next_wakeup() == POLL_INTERVAL
+
+    start = time.monotonic()
+    events = ui.wait_events()
+    elapsed = time.monotonic() - start
+
+    assert events == []
+    assert POLL_INTERVAL * 0.9 <= elapsed < POLL_INTERVAL + 0.2
+    ui.update()
+    assert poller.polled == 1
+
+
+def test_wait_events_does_not_wait_for_pending_work(ui):
+    ui.invalidate()
+    start = time.monotonic()
+    ui.wait_events()
+    assert time.monotonic() - start < 0.05